@@ -7,18 +7,27 @@ Python 3.8 compatible (discord.py 2.x)
 
 import os
 import asyncio, io, json, random, math, asyncio, time
+import concurrent.futures, functools, hashlib, heapq, itertools, shutil, sqlite3, threading, urllib.request
+from collections import OrderedDict, deque
 from typing import Optional, List, Dict, Tuple
 
+import aiohttp
 import discord
 from discord import app_commands
 from discord.ext import commands
 
 try:
-    from PIL import Image, ImageDraw, ImageFont
+    from PIL import Image
     PIL_OK = True
 except Exception:
     PIL_OK = False
 
+try:
+    import orjson
+    ORJSON_OK = True
+except Exception:
+    ORJSON_OK = False
+
 
 
 
@@ -26,17 +35,7 @@ except Exception:
 UNITS_TXT_PATH = "units.txt"
 def read_units_txt():
     """Return a list of unit names from units.txt (ignores blank lines and # comments)."""
-    out = []
-    try:
-        with open(UNITS_TXT_PATH, "r", encoding="utf-8") as f:
-            for line in f:
-                s = line.strip()
-                if not s or s.startswith("#"):
-                    continue
-                out.append(s)
-    except Exception:
-        pass
-    return out
+    return list_units()
 # -------------------- JJK-style message spawns --------------------
 import json, time, random
 
@@ -48,26 +47,31 @@ UNITSPAWN_JJK_PATH = "unitspawn_jjk.json"
 JJK_CFG = {}
 # Per-channel counters/state (non-persistent): (guild_id, channel_id) -> {"count": int, "threshold": int}
 JJK_STATE = {}
-# Active spawns: (guild_id, channel_id) -> {"unit": str, "deadline": float, "message_id": int}
+# Active spawns: (guild_id, channel_id) -> {"unit": str, "norm": _norm_name(unit), "deadline": float, "message_id": int}
 JJK_ACTIVE = {}
+# (mtime_ns, size) of unitspawn_jjk.json when JJK_CFG was last read; on_message calls
+# _jjk_load() for every message, so only re-parse when the file actually changed.
+# Saves go through the debounced JSON flusher; while a write is pending the
+# in-memory copy is newer than the file, so loads leave it alone.
+_JJK_SIG = (None, None)
 
 def _jjk_load():
-    global JJK_CFG
-    try:
-        with open(UNITSPAWN_JJK_PATH, "r", encoding="utf-8") as f:
-            JJK_CFG = json.load(f)
-    except Exception:
-        JJK_CFG = {}
+    global JJK_CFG, _JJK_SIG
+    if UNITSPAWN_JJK_PATH in _JSON_DIRTY:
+        return
+    sig = _file_sig(UNITSPAWN_JJK_PATH)
+    if sig == _JJK_SIG:
+        return
+    _JJK_SIG = sig
+    JJK_CFG = _load_json(UNITSPAWN_JJK_PATH, {})
 
 def _jjk_save():
-    try:
-        with open(UNITSPAWN_JJK_PATH, "w", encoding="utf-8") as f:
-            json.dump(JJK_CFG, f)
-    except Exception:
-        pass
+    _mark_json_dirty(UNITSPAWN_JJK_PATH, JJK_CFG)
+
+_RE_NON_ALNUM = re.compile(r"[^a-z0-9]+")
 
 def _norm_name(s: str) -> str:
-    return re.sub(r"[^a-z0-9]+", "", s.lower())
+    return _RE_NON_ALNUM.sub("", s.lower())
 
 def _jjk_threshold(min_msgs: int, max_msgs: int) -> int:
     if max_msgs < min_msgs: max_msgs = min_msgs
@@ -77,30 +81,32 @@ import json
 UNITSPAWN_CFG_PATH = "unitspawn.json"
 UNITSPAWN = {}  # guild_id -> {"channel_id": int, "min_min": 5, "max_min": 15, "reward_min": 0, "reward_max": 0, "chance": 100}
 UNITSPAWN_TASKS = {}  # guild_id -> asyncio.Task
+_UNITSPAWN_SIG = (None, None)
 
 def _unitspawn_load():
-    global UNITSPAWN
-    try:
-        with open(UNITSPAWN_CFG_PATH, "r", encoding="utf-8") as f:
-            UNITSPAWN = json.load(f)
-    except Exception:
-        UNITSPAWN = {}
+    global UNITSPAWN, _UNITSPAWN_SIG
+    if UNITSPAWN_CFG_PATH in _JSON_DIRTY:
+        return
+    sig = _file_sig(UNITSPAWN_CFG_PATH)
+    if sig == _UNITSPAWN_SIG:
+        return
+    _UNITSPAWN_SIG = sig
+    UNITSPAWN = _load_json(UNITSPAWN_CFG_PATH, {})
 
 def _unitspawn_save():
-    try:
-        with open(UNITSPAWN_CFG_PATH, "w", encoding="utf-8") as f:
-            json.dump(UNITSPAWN, f)
-    except Exception:
-        pass
+    _mark_json_dirty(UNITSPAWN_CFG_PATH, UNITSPAWN)
 # -------------------- Configuration --------------------
 ASSETS_DIR = os.environ.get("ASSETS_DIR", "units_assets")
 CASINO_ASSETS_DIR = os.environ.get("CASINO_ASSETS_DIR", "casino_assets")
 OUTPUT_DIR = os.environ.get("OUTPUT_DIR", "media")
 CONFIG_PATH = "config.json"
 ECON_PATH = "economy.json"
+ECON_DB_PATH = "econ.db"
 UNITS_TXT = "units.txt"
 ALIASES_JSON = "aliases.json"
 TOKEN_PATH = "token.txt"
+# zlib level for generated PNGs; they're short-lived attachments, so favour encode speed.
+PNG_COMPRESS_LEVEL = 1
 
 DEFAULT_CONFIG: Dict[str, object] = {
     "UPDATE_CHANNEL_ID": None,
@@ -121,39 +127,149 @@ DEFAULT_CONFIG: Dict[str, object] = {
 
 def _load_json(path: str, fallback):
     try:
+        if ORJSON_OK:
+            with open(path, "rb") as f:
+                return orjson.loads(f.read())
         with open(path, "r", encoding="utf-8") as f:
             return json.load(f)
     except Exception:
         return fallback
 
-def _save_json(path: str, data) -> None:
+def _dump_json(data) -> bytes:
+    # default=list writes deques (per-user bet history) as plain JSON arrays.
+    if ORJSON_OK:
+        return orjson.dumps(data, default=list, option=orjson.OPT_INDENT_2 | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(data, indent=2, ensure_ascii=False, default=list).encode("utf-8")
+
+def _write_atomic(path: str, payload: bytes) -> None:
     tmp = path + ".tmp"
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=2, ensure_ascii=False)
+    with open(tmp, "wb") as f:
+        f.write(payload)
     os.replace(tmp, path)
 
+def _save_json(path: str, data) -> None:
+    _write_atomic(path, _dump_json(data))
+
+async def _run_blocking(func, *args):
+    """Run a blocking call in the default executor (asyncio.to_thread needs 3.9+)."""
+    return await asyncio.get_running_loop().run_in_executor(None, functools.partial(func, *args))
+
 CONFIG: Dict[str, object] = _load_json(CONFIG_PATH, DEFAULT_CONFIG.copy())
 for k, v in DEFAULT_CONFIG.items():
     CONFIG.setdefault(k, v)
+# config.json is only read at startup, so flags used on hot paths are resolved once here.
+_UNDERSCORE_TO_SPACE = bool(CONFIG.get("UNDERSCORE_TO_SPACE", True))
 
 ECON: Dict[str, Dict] = _load_json(ECON_PATH, {
-    "balances": {},
-    "last_daily": {},
-    "settings": {},
     "history": {},
     "stats": {},
     "redeem": {}
 })
 
+# JSON state files are written by _json_flusher() instead of on every mutation: callers
+# mark a path dirty and a burst of changes inside one JSON_FLUSH_DELAY window costs a
+# single rewrite per file. Balances live in SQLite, so on busy servers the delay can be
+# raised (e.g. JSON_FLUSH_DELAY=30) at the cost of more history/stats lost on a crash.
+JSON_FLUSH_DELAY = float(os.environ.get("JSON_FLUSH_DELAY", "1.0"))
+_JSON_DIRTY: Dict[str, object] = {}
+_JSON_FLUSH_TASK: Optional[asyncio.Task] = None
+_JSON_FLUSH_LOCK: Optional[asyncio.Lock] = None
+
+def _mark_json_dirty(path: str, data) -> None:
+    _JSON_DIRTY[path] = data
+
 def _save_econ():
-    _save_json(ECON_PATH, ECON)
+    _mark_json_dirty(ECON_PATH, ECON)
+
+def _flush_json_now() -> None:
+    while _JSON_DIRTY:
+        path, data = _JSON_DIRTY.popitem()
+        _save_json(path, data)
+
+async def _flush_json() -> None:
+    """Write every dirty JSON file; serialization stays on the loop, disk writes are offloaded."""
+    global _JSON_FLUSH_LOCK
+    if _JSON_FLUSH_LOCK is None:
+        # Created lazily: on 3.8 a Lock binds to the loop current at construction.
+        _JSON_FLUSH_LOCK = asyncio.Lock()
+    # One flush at a time (the flusher and /sync can overlap), so two writers never share a
+    # .tmp file and an older snapshot can't be renamed over a newer one.
+    async with _JSON_FLUSH_LOCK:
+        pending = [(path, data, _dump_json(data)) for path, data in _JSON_DIRTY.items()]
+        _JSON_DIRTY.clear()
+        async def write(path: str, data, payload: bytes):
+            try:
+                await _run_blocking(_write_atomic, path, payload)
+            except Exception as e:
+                _JSON_DIRTY.setdefault(path, data)
+                print(f"[json] flush of {path} failed: {e}")
+        await asyncio.gather(*(write(*item) for item in pending))
+
+async def _json_flusher():
+    while True:
+        await asyncio.sleep(JSON_FLUSH_DELAY)
+        if _JSON_DIRTY:
+            await _flush_json()
+
+# Balances, daily-claim timestamps and guild settings live in SQLite so each change is
+# a single indexed upsert instead of a rewrite of economy.json. WAL with
+# synchronous=NORMAL only fsyncs at checkpoints, which is plenty for bot state.
+_DB_LOCK = threading.Lock()
+_DB = sqlite3.connect(ECON_DB_PATH, check_same_thread=False)
+_DB.execute("PRAGMA journal_mode=WAL")
+_DB.execute("PRAGMA synchronous=NORMAL")
+_DB.executescript("""
+CREATE TABLE IF NOT EXISTS balances (guild INTEGER NOT NULL, user INTEGER NOT NULL, amt INTEGER NOT NULL DEFAULT 0, PRIMARY KEY (guild, user));
+CREATE INDEX IF NOT EXISTS balances_by_amt ON balances (guild, amt DESC);
+CREATE TABLE IF NOT EXISTS last_daily (guild INTEGER NOT NULL, user INTEGER NOT NULL, ts INTEGER NOT NULL, PRIMARY KEY (guild, user));
+CREATE TABLE IF NOT EXISTS settings (guild INTEGER NOT NULL, key TEXT NOT NULL, value TEXT NOT NULL, PRIMARY KEY (guild, key));
+""")
+_BALANCE_UPSERT = "INSERT INTO balances (guild, user, amt) VALUES (?, ?, ?) ON CONFLICT(guild, user) DO UPDATE SET amt = amt + excluded.amt"
+_SETTINGS_UPSERT = "INSERT INTO settings (guild, key, value) VALUES (?, ?, ?) ON CONFLICT(guild, key) DO UPDATE SET value = excluded.value"
+
+def _db_exec(sql: str, params=()) -> int:
+    with _DB_LOCK, _DB:
+        return _DB.execute(sql, params).rowcount
+
+def _db_execmany(sql: str, rows) -> None:
+    with _DB_LOCK, _DB:
+        _DB.executemany(sql, rows)
+
+def _db_query(sql: str, params=()) -> List[tuple]:
+    with _DB_LOCK:
+        return _DB.execute(sql, params).fetchall()
+
+# Every write from a coroutine goes through this single worker thread, so writes reach the
+# database in the order they were issued (a guild reset can't overtake an earlier upsert).
+_DB_WRITER = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="econ-db")
+
+async def _db_write(func, *args):
+    """Run a _db_exec/_db_execmany call on the writer thread, in call order."""
+    return await asyncio.get_running_loop().run_in_executor(_DB_WRITER, functools.partial(func, *args))
+
+# Per-user bet history is a bounded deque: appends past HISTORY_MAX drop the oldest entry.
+HISTORY_MAX = 100
+_new_history = functools.partial(deque, maxlen=HISTORY_MAX)
 
 def _migrate_econ():
-    """Ensure top-level ECON keys exist (handles old economy.json files)."""
-    ECON.setdefault("balances", {})
-    ECON.setdefault("last_daily", {})
-    ECON.setdefault("settings", {})
-    ECON.setdefault("history", {})
+    """Upgrade an old economy.json in place.
+
+    Legacy balances, last_daily and settings are copied into SQLite (existing rows win) and
+    dropped from ECON; history lists become bounded deques; stats/redeem keys are ensured.
+    """
+    for table, legacy in (("balances", ECON.pop("balances", None)), ("last_daily", ECON.pop("last_daily", None))):
+        if not legacy:
+            continue
+        col = "amt" if table == "balances" else "ts"
+        rows = [(int(g), int(u), int(v)) for g, users in legacy.items() for u, v in users.items()]
+        _db_execmany(f"INSERT INTO {table} (guild, user, {col}) VALUES (?, ?, ?) ON CONFLICT(guild, user) DO NOTHING", rows)
+    legacy = ECON.pop("settings", None)
+    if legacy:
+        rows = [(int(g), k, json.dumps(v)) for g, kv in legacy.items() for k, v in kv.items()]
+        _db_execmany("INSERT INTO settings (guild, key, value) VALUES (?, ?, ?) ON CONFLICT(guild, key) DO NOTHING", rows)
+    for users in ECON.setdefault("history", {}).values():
+        for u, arr in users.items():
+            users[u] = _new_history(arr)
     ECON.setdefault("stats", {})
     ECON.setdefault("redeem", {})
     _save_econ()
@@ -161,75 +277,227 @@ def _migrate_econ():
 _migrate_econ()
 
 # -------------------- Helpers --------------------
+@functools.lru_cache(maxsize=4096)
 def norm_key(name: str) -> str:
     return " ".join(name.lower().replace("_", " ").split())
 
 def _now_ts() -> int:
     return int(time.time())
 
+# Parsed units.txt / aliases.json, reused while the file's (mtime, size) is unchanged.
+# "grams" maps each 2-character substring of a normalized name to the (ascending) indexes
+# of the units containing it, so find_unit's prefix/substring fallback only checks units
+# that contain every bigram of the query.
+_UNITS_CACHE: Dict[str, object] = {"mtime": None, "size": None, "data": [], "norm": [], "by_norm": {}, "grams": {}}
+_ALIASES_CACHE: Dict[str, object] = {"mtime": None, "size": None, "data": {}}
+
+def _file_sig(path: str) -> Tuple[Optional[int], Optional[int]]:
+    try:
+        st = os.stat(path)
+    except OSError:
+        return (None, None)
+    return (st.st_mtime_ns, st.st_size)
+
 def list_units() -> List[str]:
+    """Return unit names from units.txt; the file is only re-parsed when it changes.
+
+    The returned list is shared between callers, so treat it as read-only.
+    """
+    mtime, size = _file_sig(UNITS_TXT)
+    if mtime is None:
+        _UNITS_CACHE.update(mtime=None, size=None, data=[], norm=[], by_norm={}, grams={})
+        return _UNITS_CACHE["data"]
+    if _UNITS_CACHE["mtime"] == mtime and _UNITS_CACHE["size"] == size:
+        return _UNITS_CACHE["data"]
+    out = []
     try:
         with open(UNITS_TXT, "r", encoding="utf-8") as f:
-            out = []
             for ln in f:
                 s = ln.strip()
                 if not s or s.startswith("#"):
                     continue
                 out.append(s)
-            return out
     except Exception:
         return []
+    norm = [norm_key(u) for u in out]
+    by_norm: Dict[str, str] = {}
+    grams: Dict[str, List[int]] = {}
+    for i, (nk, u) in enumerate(zip(norm, out)):
+        by_norm.setdefault(nk, u)
+        for g in {nk[j:j+2] for j in range(len(nk) - 1)}:
+            grams.setdefault(g, []).append(i)
+    _UNITS_CACHE.update(mtime=mtime, size=size, data=out, norm=norm, by_norm=by_norm, grams=grams)
+    return out
 
 def load_aliases() -> Dict[str, str]:
     data = _load_json(ALIASES_JSON, {})
     return {norm_key(k): v for k, v in data.items()}
 
-ALIASES = load_aliases()
+def get_aliases() -> Dict[str, str]:
+    """Current aliases.json mapping; reloaded whenever the file changes on disk."""
+    mtime, size = _file_sig(ALIASES_JSON)
+    if _ALIASES_CACHE["mtime"] != mtime or _ALIASES_CACHE["size"] != size:
+        _ALIASES_CACHE.update(mtime=mtime, size=size, data=load_aliases() if mtime is not None else {})
+    return _ALIASES_CACHE["data"]
 
-def unit_to_filename(name: str) -> str:
-    base = name
-    if CONFIG.get("UNDERSCORE_TO_SPACE", True):
-        base = base.replace("_", " ")
-    return base
+# (norm_key(stem), panel) -> path for every image in ASSETS_DIR; rebuilt when the
+# directory's mtime changes (files added, removed or renamed).
+ASSET_EXTS = (".png", ".jpg", ".jpeg")
+_ASSET_PANEL_RE = re.compile(r"^(.*?)[ _](-?\d+)$")
+_ASSET_INDEX: Dict[str, object] = {"mtime": None, "map": {}, "files": ()}
+
+def _asset_index() -> Dict[Tuple[str, Optional[int]], str]:
+    try:
+        mtime = os.stat(ASSETS_DIR).st_mtime_ns
+    except OSError:
+        _ASSET_INDEX.update(mtime=None, map={}, files=())
+        return _ASSET_INDEX["map"]
+    if _ASSET_INDEX["mtime"] == mtime:
+        return _ASSET_INDEX["map"]
+    found: Dict[Tuple[str, Optional[int]], Tuple[int, str]] = {}
+    files: List[str] = []
+    try:
+        with os.scandir(ASSETS_DIR) as it:
+            for entry in it:
+                stem, ext = os.path.splitext(entry.name)
+                ext = ext.lower()
+                if ext not in ASSET_EXTS or not entry.is_file():
+                    continue
+                files.append(entry.name)
+                rank = ASSET_EXTS.index(ext)
+                keys = [(norm_key(stem), None)]
+                m = _ASSET_PANEL_RE.match(stem)
+                if m:
+                    keys.append((norm_key(m.group(1)), int(m.group(2))))
+                for k in keys:
+                    cur = found.get(k)
+                    if cur is None or rank < cur[0]:
+                        found[k] = (rank, entry.path)
+    except OSError:
+        return _ASSET_INDEX["map"]
+    _ASSET_INDEX.update(mtime=mtime, map={k: v[1] for k, v in found.items()}, files=tuple(sorted(files)))
+    return _ASSET_INDEX["map"]
+
+def _asset_index_add(path: str) -> None:
+    """Fold one just-written image into the current index instead of rescanning ASSETS_DIR.
+
+    Only valid when the index was fresh just before the write (see _save_attachment).
+    """
+    name = os.path.basename(path)
+    stem, ext = os.path.splitext(name); ext = ext.lower()
+    if ext not in ASSET_EXTS or _ASSET_INDEX["mtime"] is None:
+        return
+    try:
+        mtime = os.stat(ASSETS_DIR).st_mtime_ns
+    except OSError:
+        _ASSET_INDEX["mtime"] = None
+        return
+    idx = dict(_ASSET_INDEX["map"]); rank = ASSET_EXTS.index(ext)
+    keys = [(norm_key(stem), None)]
+    m = _ASSET_PANEL_RE.match(stem)
+    if m:
+        keys.append((norm_key(m.group(1)), int(m.group(2))))
+    for k in keys:
+        cur = idx.get(k)
+        if cur is None or rank < ASSET_EXTS.index(os.path.splitext(cur)[1].lower()):
+            idx[k] = path
+    files = _ASSET_INDEX["files"]
+    if name not in files:
+        files = tuple(sorted(files + (name,)))
+    _ASSET_INDEX.update(mtime=mtime, map=idx, files=files)
+
+def _asset_files() -> Tuple[str, ...]:
+    """Sorted image filenames in ASSETS_DIR, from the same scan as the asset index."""
+    _asset_index()
+    return _ASSET_INDEX["files"]
 
 def asset_path_for(name: str, panel: int = 1) -> Optional[str]:
-    if not os.path.isdir(ASSETS_DIR):
-        return None
-    candidates = []
-    base = unit_to_filename(name)
-    roots = {base, base.replace(" ", "_"), base.replace("_", " ")}
-    exts = [".png", ".jpg", ".jpeg"]
-    suffixes = [f" {panel}", f"_{panel}", ""] if panel == 1 else [f" {panel}", f"_{panel}"]
-    for root in roots:
-        for suf in suffixes:
-            for ext in exts:
-                p = os.path.join(ASSETS_DIR, f"{root}{suf}{ext}")
-                if os.path.isfile(p):
-                    candidates.append(p)
-    return candidates[0] if candidates else None
+    idx = _asset_index()
+    key = norm_key(name)
+    p = idx.get((key, panel))
+    if p is None and panel == 1:
+        p = idx.get((key, None))
+    return p
+
+# _panel_paths results for the current asset index; swapped out whenever the index is rebuilt.
+_PANEL_PATHS: Dict[str, object] = {"map": None, "paths": {}}
+_PANEL_PATHS_MAX = 4096
+
+def _panel_paths(name: str) -> Tuple[Optional[str], Optional[str]]:
+    """(first panel, second panel) paths for a unit from a single index lookup."""
+    idx = _asset_index()
+    if _PANEL_PATHS["map"] is not idx or len(_PANEL_PATHS["paths"]) >= _PANEL_PATHS_MAX:
+        _PANEL_PATHS.update(map=idx, paths={})
+    memo = _PANEL_PATHS["paths"]
+    hit = memo.get(name)
+    if hit is None:
+        key = norm_key(name)
+        p1 = idx.get((key, 1)) or idx.get((key, None)) or idx.get((key, 0)) or idx.get((key, -1))
+        hit = memo[name] = (p1, idx.get((key, 2)))
+    return hit
+
+# units.txt entries that have a first-panel image, for the quiz/spawn pickers; rebuilt
+# when either the parsed unit list or the asset index is replaced.
+_SPAWNABLE: Dict[str, object] = {"units": None, "map": None, "data": []}
+
+def spawnable_units() -> List[str]:
+    """Units with a panel-1 image, in units.txt order (shared list, treat as read-only)."""
+    units = list_units(); idx = _asset_index()
+    if _SPAWNABLE["units"] is not units or _SPAWNABLE["map"] is not idx:
+        _SPAWNABLE.update(units=units, map=idx, data=[u for u in units if asset_path_for(u, 1)])
+    return _SPAWNABLE["data"]
+
+# find_unit results for the current units.txt / aliases.json parse; popular names are
+# looked up over and over, and a miss otherwise costs a scan of every unit.
+_FIND_CACHE: Dict[str, object] = {"units": None, "aliases": None, "hits": {}}
+_FIND_CACHE_MAX = 2048
 
 def find_unit(query: str) -> Optional[str]:
     key = norm_key(query)
-    if key in ALIASES:
-        return ALIASES[key]
-    units = read_units_txt()
+    aliases = get_aliases(); units = list_units()
+    if _FIND_CACHE["units"] is not units or _FIND_CACHE["aliases"] is not aliases or len(_FIND_CACHE["hits"]) >= _FIND_CACHE_MAX:
+        _FIND_CACHE.update(units=units, aliases=aliases, hits={})
+    hits = _FIND_CACHE["hits"]
+    if key not in hits:
+        hits[key] = _find_unit_uncached(key, aliases, units)
+    return hits[key]
+
+def _find_unit_uncached(key: str, aliases: Dict[str, str], units: List[str]) -> Optional[str]:
+    if key in aliases:
+        return aliases[key]
     if not units:
         return None
-    low = [u.lower() for u in units]
-    if key in low:
-        return units[low.index(key)]
-    for u in units:
-        if norm_key(u).startswith(key):
-            return u
-    for u in units:
-        if key in norm_key(u):
-            return u
-    return None
+    exact = _UNITS_CACHE["by_norm"].get(key)
+    if exact is not None:
+        return exact
+    norm = _UNITS_CACHE["norm"]
+    contains = None
+    for i in _gram_candidates(key) if len(key) >= 2 else range(len(units)):
+        nk = norm[i]
+        if nk.startswith(key):
+            return units[i]
+        if contains is None and key in nk:
+            contains = units[i]
+    return contains
+
+def _gram_candidates(key: str) -> List[int]:
+    """Indexes (in units.txt order) of units whose normalized name has every bigram of key."""
+    grams = _UNITS_CACHE["grams"]
+    postings = sorted((grams.get(key[j:j+2], ()) for j in range(len(key) - 1)), key=len)
+    cand = set(postings[0])
+    for p in postings[1:]:
+        if not cand:
+            break
+        cand.intersection_update(p)
+    return sorted(cand)
+
+def _ensure_dir(path: str) -> None:
+    if not os.path.isdir(path):
+        os.makedirs(path, exist_ok=True)
 
 def ensure_dirs():
-    os.makedirs(ASSETS_DIR, exist_ok=True)
-    os.makedirs(CASINO_ASSETS_DIR, exist_ok=True)
-    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    for d in (ASSETS_DIR, CASINO_ASSETS_DIR, OUTPUT_DIR):
+        _ensure_dir(d)
 
 ensure_dirs()
 
@@ -237,12 +505,7 @@ ensure_dirs()
 
 def list_unit_images_one_panel() -> list:
     """Return absolute paths of images in units_assets that end with '1.png'."""
-    paths = []
-    if os.path.isdir(ASSETS_DIR):
-        for fn in sorted(os.listdir(ASSETS_DIR)):
-            if fn.lower().endswith("1.png"):
-                paths.append(os.path.join(ASSETS_DIR, fn))
-    return paths
+    return [os.path.join(ASSETS_DIR, fn) for fn in _asset_files() if fn.lower().endswith("1.png")]
 
 
 
@@ -251,7 +514,6 @@ def list_unit_images_one_panel() -> list:
 def _download_image_sync(url: str, dest_path: str) -> bool:
     """Small sync downloader (urllib) used only by admin or background task."""
     try:
-        import urllib.request
         with urllib.request.urlopen(url, timeout=10) as resp:
             data = resp.read()
         with open(dest_path, "wb") as f:
@@ -263,7 +525,7 @@ def _download_image_sync(url: str, dest_path: str) -> bool:
 def _ensure_online_casino_images(min_count: int = 6) -> None:
     """If casino_assets is empty, fetch a few square images from Picsum."""
     try:
-        os.makedirs(CASINO_ASSETS_DIR, exist_ok=True)
+        _ensure_dir(CASINO_ASSETS_DIR)
         existing = [fn for fn in os.listdir(CASINO_ASSETS_DIR) if fn.lower().endswith(('.png','.jpg','.jpeg'))]
     except Exception:
         existing = []
@@ -281,17 +543,15 @@ def casino_banner_image(max_tiles: int = 6, tile_size: int = 110, pad: int = 8)
         return None
     if not os.path.isdir(CASINO_ASSETS_DIR):
         return None
-    files = [os.path.join(ASSETS_DIR, fn) for fn in sorted(os.listdir(ASSETS_DIR)) if fn.lower().endswith("1.png")]
+    files = list_unit_images_one_panel()
     if not files:
         return None
-    import random
     chosen = files[:max_tiles] if len(files) <= max_tiles else random.sample(files, max_tiles)
-    from PIL import Image
     tiles = []
     for p in chosen:
         try:
             im = Image.open(p).convert("RGBA")
-            im = im.resize((tile_size, tile_size), Image.LANCZOS)
+            im = im.resize((tile_size, tile_size), Image.BILINEAR, reducing_gap=3.0)
             tiles.append(im)
         except Exception:
             continue
@@ -305,26 +565,81 @@ def casino_banner_image(max_tiles: int = 6, tile_size: int = 110, pad: int = 8)
         out.paste(t, (x, pad), t)
         x += t.width + pad
     buf = io.BytesIO()
-    out.save(buf, format="PNG")
+    out.save(buf, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
     return buf.getvalue()
 
 # -------------------- Image helpers --------------------
-FONT = None
-if PIL_OK:
+# Composites live in cache/v<PANEL_CACHE_VERSION>; bump the version when the layout changes.
+# Older version folders (and the pre-versioned flat files) are removed at startup.
+PANEL_CACHE_ROOT = os.path.join(OUTPUT_DIR, "cache")
+PANEL_CACHE_VERSION = 2
+PANEL_CACHE_DIR = os.path.join(PANEL_CACHE_ROOT, f"v{PANEL_CACHE_VERSION}")
+
+def _prune_panel_cache_versions() -> None:
     try:
-        FONT = ImageFont.load_default()
-    except Exception:
-        FONT = None
+        entries = list(os.scandir(PANEL_CACHE_ROOT))
+    except OSError:
+        return
+    for entry in entries:
+        if entry.path == PANEL_CACHE_DIR:
+            continue
+        try:
+            if entry.is_dir(follow_symlinks=False): shutil.rmtree(entry.path)
+            else: os.remove(entry.path)
+        except OSError:
+            pass
 
-def compose_unit_panel(name: str) -> Optional[bytes]:
-    p1 = asset_path_for(name, 1) or asset_path_for(name, 0) or asset_path_for(name, -1)
-    p2 = asset_path_for(name, 2)
-    if not p1 and not p2:
+_prune_panel_cache_versions()
+
+def _mtime_ns(path: Optional[str]) -> Optional[int]:
+    if not path:
         return None
-    if not PIL_OK or not p1:
-        target = p1 or p2
-        with open(target, "rb") as f:
-            return f.read()
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+def compose_unit_panel_file(name: str) -> Tuple[Optional[bytes], Optional[str]]:
+    """(png_bytes, None) when panels must be stacked, (None, path) when one asset can be sent as-is."""
+    p1, p2 = _panel_paths(name)
+    if not p1 or not p2:
+        return None, p1 or p2
+    if not PIL_OK:
+        return None, p1
+    mt1, mt2 = _mtime_ns(p1), _mtime_ns(p2)
+    cached = _panel_cache_path(p1, p2, mt1, mt2)
+    if os.path.isfile(cached):
+        return None, cached
+    return _compose_impl(p1, p2, cached), None
+
+def unit_panel_file(name: str, stem: str = "unit") -> Optional[discord.File]:
+    """discord.File for a unit panel; single assets are streamed from disk instead of buffered."""
+    img, path = compose_unit_panel_file(name)
+    if path:
+        return discord.File(path, filename=stem + os.path.splitext(path)[1].lower())
+    if img:
+        return discord.File(io.BytesIO(img), filename=f"{stem}.png")
+    return None
+
+# Only the cache file name is memoized; the composite itself lives on disk, not in memory.
+# Names are <pair>-<mtimes>.png, so a re-render after an art update can find and drop the
+# stale file for the same pair (see _compose_impl).
+@functools.lru_cache(maxsize=256)
+def _panel_cache_path(p1: Optional[str], p2: Optional[str], mt1: Optional[int], mt2: Optional[int]) -> str:
+    pair = hashlib.sha1(f"{p1}|{p2}".encode("utf-8")).hexdigest()[:20]
+    state = hashlib.sha1(f"{mt1}|{mt2}".encode("utf-8")).hexdigest()[:20]
+    return os.path.join(PANEL_CACHE_DIR, f"{pair}-{state}.png")
+
+def _drop_stale_panels(cached: str) -> None:
+    """Remove other composites of the same panel pair; only the newest one is ever served."""
+    name = os.path.basename(cached); prefix = name.split("-", 1)[0] + "-"
+    for fn in os.listdir(PANEL_CACHE_DIR):
+        if fn.startswith(prefix) and fn != name:
+            try: os.remove(os.path.join(PANEL_CACHE_DIR, fn))
+            except OSError: pass
+
+def _compose_impl(p1: str, p2: str, cached: str) -> bytes:
+    """Render the stacked panel PNG and store it at cached (see compose_unit_panel_file)."""
     try:
         img1 = Image.open(p1).convert("RGBA")
         if p2 and os.path.isfile(p2):
@@ -332,57 +647,38 @@ def compose_unit_panel(name: str) -> Optional[bytes]:
             w = max(img1.width, img2.width)
             h = img1.height + img2.height
             out = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-            out.paste(img1, (0, 0), img1)
-            out.paste(img2, (0, img1.height), img2)
+            # The panels don't overlap and the canvas is empty, so copy rows straight
+            # across instead of alpha-blending against transparent pixels.
+            out.paste(img1, (0, 0))
+            out.paste(img2, (0, img1.height))
         else:
             out = img1
         buf = io.BytesIO()
-        out.save(buf, format="PNG")
-        return buf.getvalue()
+        out.save(buf, format="PNG", compress_level=PNG_COMPRESS_LEVEL)
+        data = buf.getvalue()
     except Exception:
         with open(p1, "rb") as f:
             return f.read()
+    try:
+        _ensure_dir(PANEL_CACHE_DIR)
+        # Unique per render: two threads composing the same unit must not share a .tmp file.
+        tmp = f"{cached}.{os.urandom(6).hex()}.tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, cached)
+        _drop_stale_panels(cached)
+    except OSError:
+        pass
+    return data
 
-def build_collage(names: List[str], price_labels: Optional[List[str]] = None) -> Optional[bytes]:
-    if not PIL_OK:
-        return None
-    tiles: List[Image.Image] = []
-    for nm in names:
-        p = asset_path_for(nm, 1) or asset_path_for(nm, 0) or asset_path_for(nm, -1)
-        if not p:
-            continue
-        try:
-            im = Image.open(p).convert("RGBA")
-            im = im.resize((110, 110), Image.LANCZOS)
-            fr = Image.new("RGBA", (126, 126), (60, 42, 16, 255))
-            fr.paste(im, (8, 8), im)
-            tiles.append(fr)
-        except Exception:
-            continue
-    if not tiles:
-        return None
-    pad = 8
-    w = pad + sum(t.width + pad for t in tiles)
-    h = tiles[0].height + pad * 2
-    out = Image.new("RGBA", (w, h), (35, 26, 18, 255))
-    x = pad
-    draw = ImageDraw.Draw(out)
-    for idx, t in enumerate(tiles):
-        out.paste(t, (x, pad), t)
-        if price_labels and idx < len(price_labels) and FONT:
-            lbl = price_labels[idx]
-            tw, th = draw.textsize(lbl, font=FONT)
-            draw.rectangle([x+4, pad + t.height - th - 6, x+4+tw+6, pad + t.height - 4], fill=(0,0,0,160))
-            draw.text((x+7, pad + t.height - th - 5), lbl, font=FONT, fill=(0,255,0))
-        x += t.width + pad
-    buf = io.BytesIO()
-    out.save(buf, format="PNG")
-    return buf.getvalue()
 
 # -------------------- Bot setup --------------------
 intents = discord.Intents.default()
-intents.members = True
-bot = commands.Bot(command_prefix="!", intents=intents)
+# Nothing reads the member list or past messages (names are rendered as <@id> mentions),
+# so skip the members intent, guild chunking and the message cache.
+intents.members = False
+bot = commands.AutoShardedBot(command_prefix="!", intents=intents, member_cache_flags=discord.MemberCacheFlags.none(),
+                              chunk_guilds_at_startup=False, max_messages=None)
 tree = bot.tree
 
 # Casino admin slash command group
@@ -399,58 +695,226 @@ async def send_text(inter: discord.Interaction, text: str, ephemeral: bool = Tru
     except Exception:
         pass
 
+# Discord allows roughly 5 edits per 5s on one message; animated embeds go through
+# ThrottledEditor so in-between frames are dropped instead of queueing behind 429s.
+MESSAGE_EDIT_INTERVAL = 1.0
+# Animated edits in flight across all games at once; with ~100ms round-trips this keeps
+# a burst of concurrent rounds well under Discord's 50 req/s global limit.
+MAX_CONCURRENT_EDITS = 5
+_EDIT_SEM: Optional[asyncio.Semaphore] = None
+
+def _edit_sem() -> asyncio.Semaphore:
+    # Created lazily: on 3.8 a Semaphore binds to the loop current at construction.
+    global _EDIT_SEM
+    if _EDIT_SEM is None:
+        _EDIT_SEM = asyncio.Semaphore(MAX_CONCURRENT_EDITS)
+    return _EDIT_SEM
+
+class ThrottledEditor:
+    """Calls edit(**kwargs) at most once per interval; a skipped frame is kept for flush().
+
+    edit is e.g. message.edit or interaction.edit_original_response.
+    """
+    def __init__(self, edit, interval: float = MESSAGE_EDIT_INTERVAL):
+        self.edit = edit; self.interval = interval
+        self.next_at = 0.0; self.pending: Optional[dict] = None; self.sent: Optional[dict] = None
+        self.closed = False
+    def close(self) -> None:
+        """Drop pending and queued frames; call before editing the message some other way."""
+        self.closed = True; self.pending = None
+    async def maybe_edit(self, **kwargs) -> bool:
+        if time.monotonic() < self.next_at:
+            self.pending = kwargs
+            return False
+        await self.flush(**kwargs)
+        return True
+    async def flush(self, **kwargs) -> None:
+        kwargs = kwargs or self.pending; self.pending = None
+        # Embeds compare by content, so a frame identical to the last one sent is skipped.
+        if kwargs and kwargs != self.sent:
+            # Slots are booked before the edit and step from the previous slot, so neither the
+            # edit's round-trip nor a late wake-up pushes the next frame out of its slot. After
+            # an idle spell this lets two edits through back to back, still inside the bucket.
+            self.next_at = max(self.next_at, time.monotonic() - self.interval) + self.interval
+            async with _edit_sem():
+                # A frame that waited on the semaphore must not overwrite a final message
+                # written while it was queued (e.g. /crash's cash-out).
+                if self.closed:
+                    return
+                await self.edit(**kwargs)
+            self.sent = kwargs
+
 # --------------- Economy helpers ---------------
+# Per-guild settings keyed by int id, loaded from the settings table on first use;
+# the writers below update the dict and upsert the changed keys.
+_SETTINGS_CACHE: Dict[int, Dict[str, object]] = {}
+
 def guild_settings(guild_id: int) -> Dict[str, object]:
-    g = str(guild_id)
-    return ECON["settings"].setdefault(g, {})
+    gid = int(guild_id)
+    s = _SETTINGS_CACHE.get(gid)
+    if s is None:
+        rows = _db_query("SELECT key, value FROM settings WHERE guild = ?", (gid,))
+        s = _SETTINGS_CACHE[gid] = {k: json.loads(v) for k, v in rows}
+    return s
+
+def _apply_guild_settings(guild_id: int, mapping: Dict[str, object]) -> List[tuple]:
+    """Update the cached settings; returns upsert rows for the keys that actually changed."""
+    s = guild_settings(guild_id)
+    changed = {k: v for k, v in mapping.items() if k not in s or s[k] != v}
+    if changed:
+        s.update(changed)
+        _LIMITS_CACHE.pop(int(guild_id), None)
+    return [(int(guild_id), k, json.dumps(v)) for k, v in changed.items()]
 
 def set_guild_setting(guild_id: int, key: str, value) -> None:
-    ECON.setdefault("settings", {}).setdefault(str(guild_id), {})[key] = value
-    _save_econ()
+    set_guild_settings_bulk(guild_id, {key: value})
+
+def set_guild_settings_bulk(guild_id: int, mapping: Dict[str, object]) -> bool:
+    """Apply several settings in one transaction; returns False when nothing changed."""
+    rows = _apply_guild_settings(guild_id, mapping)
+    if rows:
+        _db_execmany(_SETTINGS_UPSERT, rows)
+    return bool(rows)
+
+async def aset_guild_settings_bulk(guild_id: int, mapping: Dict[str, object]) -> None:
+    """set_guild_settings_bulk with the database write done off the loop."""
+    rows = _apply_guild_settings(guild_id, mapping)
+    if rows:
+        await _db_write(_db_execmany, _SETTINGS_UPSERT, rows)
 
 def guild_setting(guild_id: int, key: str, default=None):
-    g = str(guild_id)
-    if g in ECON.get("settings", {}) and key in ECON["settings"][g]:
-        return ECON["settings"][g][key]
+    s = guild_settings(guild_id)
+    if key in s:
+        return s[key]
     return CONFIG.get(key, default)
 
+def guild_settings_many(guild_id: int, keys) -> Dict[str, object]:
+    """guild_setting for several keys at once (defaults come from CONFIG)."""
+    s = guild_settings(guild_id)
+    return {k: s[k] if k in s else CONFIG.get(k) for k in keys}
+
+# Parsed _limits() tuples by guild id; the settings writers above drop a guild's entry.
+_LIMITS_CACHE: Dict[int, Tuple[int, int, float, int, str]] = {}
+
 def _limits(guild_id: int) -> Tuple[int, int, float, int, str]:
+    cached = _LIMITS_CACHE.get(int(guild_id))
+    if cached is not None:
+        return cached
     s = guild_settings(guild_id)
     min_bet = int(s.get("MIN_BET", CONFIG.get("MIN_BET", 10)))
     max_bet = int(s.get("MAX_BET", CONFIG.get("MAX_BET", 50000)))
     edge = float(s.get("HOUSE_EDGE", CONFIG.get("HOUSE_EDGE", 0.02)))
     daily = int(s.get("DAILY_AMOUNT", CONFIG.get("DAILY_AMOUNT", 500)))
     curr = str(s.get("CURRENCY", CONFIG.get("CURRENCY", "🍀")))
-    return (min_bet, max_bet, edge, daily, curr)
-
-async def eco_add(guild_id: int, user_id: int, delta: int) -> int:
-    """Add delta and update stats (safe for old economy.json)."""
+    _LIMITS_CACHE[int(guild_id)] = (min_bet, max_bet, edge, daily, curr)
+    return _LIMITS_CACHE[int(guild_id)]
+
+# Write-through cache of recently used balances, keyed by (guild_id, user_id).
+_BAL_CACHE: "OrderedDict[Tuple[int, int], int]" = OrderedDict()
+_BAL_CACHE_MAX = 4096
+
+def _bal_cache_put(key: Tuple[int, int], bal: int) -> None:
+    _BAL_CACHE[key] = bal
+    _BAL_CACHE.move_to_end(key)
+    if len(_BAL_CACHE) > _BAL_CACHE_MAX:
+        _BAL_CACHE.popitem(last=False)
+
+_STATS_DEFAULT = {"bets": 0, "won": 0, "lost": 0, "biggest": 0}
+
+def _user_bucket(table: str, g: str, u: str, factory):
+    """ECON[table][g][u], created on first use (_migrate_econ guarantees the table)."""
+    guild = ECON[table].get(g)
+    if guild is None:
+        guild = ECON[table][g] = {}
+    v = guild.get(u)
+    if v is None:
+        v = guild[u] = factory()
+    return v
+
+def _user_stats(g: str, u: str) -> Dict[str, int]:
+    return _user_bucket("stats", g, u, _STATS_DEFAULT.copy)
+
+def _eco_apply(guild_id: int, user_id: int, delta: int) -> Tuple[int, tuple]:
+    """Apply delta to the cached balance and stats; returns (new balance, balances upsert row)."""
     g = str(guild_id); u = str(user_id)
-    ECON.setdefault("balances", {}).setdefault(g, {})
-    ECON["balances"][g][u] = int(ECON["balances"][g].get(u, 0)) + int(delta)
-    ECON.setdefault("stats", {}).setdefault(g, {}).setdefault(u, {"bets":0,"won":0,"lost":0,"biggest":0})
+    key = (int(guild_id), int(user_id))
+    bal = eco_get(guild_id, user_id) + int(delta)
+    _bal_cache_put(key, bal)
+    st = _user_stats(g, u); delta = int(delta)
     if delta > 0:
-        ECON["stats"][g][u]["won"] += int(delta)
-        if int(delta) > ECON["stats"][g][u]["biggest"]:
-            ECON["stats"][g][u]["biggest"] = int(delta)
+        st["won"] += delta
+        if delta > st["biggest"]:
+            st["biggest"] = delta
     elif delta < 0:
-        ECON["stats"][g][u]["lost"] += int(-delta)
+        st["lost"] -= delta
     _save_econ()
-    return ECON["balances"][g][u]
+    return bal, (key[0], key[1], delta)
+
+async def eco_add(guild_id: int, user_id: int, delta: int) -> int:
+    """Add delta and update stats (safe for old economy.json)."""
+    bal, row = _eco_apply(guild_id, user_id, delta)
+    try:
+        await _db_write(_db_exec, _BALANCE_UPSERT, row)
+    except Exception:
+        # Drop the optimistic cache entry so the next read comes from the database.
+        _BAL_CACHE.pop(row[:2], None)
+        raise
+    return bal
+
+async def eco_transfer(guild_id: int, src_id: int, dst_id: int, amount: int) -> int:
+    """Move amount between two users in one transaction; returns the recipient's new balance."""
+    _, debit = _eco_apply(guild_id, src_id, -amount)
+    bal, credit = _eco_apply(guild_id, dst_id, amount)
+    try:
+        await _db_write(_db_execmany, _BALANCE_UPSERT, (debit, credit))
+    except Exception:
+        _BAL_CACHE.pop(debit[:2], None); _BAL_CACHE.pop(credit[:2], None)
+        raise
+    return bal
 
 def log_history(guild_id: int, user_id: int, game: str, bet: int, result_delta: int) -> None:
     g = str(guild_id); u = str(user_id)
-    ECON.setdefault("history", {}).setdefault(g, {}).setdefault(u, [])
-    ECON["history"][g][u].append({"t": _now_ts(), "game": game, "bet": int(bet), "result": int(result_delta)})
-    if len(ECON["history"][g][u]) > 100:
-        ECON["history"][g][u] = ECON["history"][g][u][-100:]
-    ECON.setdefault("stats", {}).setdefault(g, {}).setdefault(u, {"bets":0,"won":0,"lost":0,"biggest":0})
-    ECON["stats"][g][u]["bets"] += 1
+    _user_bucket("history", g, u, _new_history).append({"t": _now_ts(), "game": game, "bet": int(bet), "result": int(result_delta)})
+    _user_stats(g, u)["bets"] += 1
     _save_econ()
 
 def eco_get(guild_id: int, user_id: int) -> int:
-    return int(ECON.get("balances", {}).get(str(guild_id), {}).get(str(user_id), 0))
-
+    key = (int(guild_id), int(user_id))
+    bal = _BAL_CACHE.get(key)
+    if bal is None:
+        rows = _db_query("SELECT amt FROM balances WHERE guild = ? AND user = ?", key)
+        bal = int(rows[0][0]) if rows else 0
+    _bal_cache_put(key, bal)
+    return bal
+
+def eco_top(guild_id: int, limit: int = 10) -> List[Tuple[int, int]]:
+    return _db_query("SELECT user, amt FROM balances WHERE guild = ? ORDER BY amt DESC LIMIT ?", (int(guild_id), int(limit)))
+
+async def eco_reset_guild(guild_id: int) -> None:
+    gid = int(guild_id)
+    def drop_cached():
+        for key in [k for k in _BAL_CACHE if k[0] == gid]:
+            del _BAL_CACHE[key]
+    # Cleared again afterwards: a cache miss while the DELETE is queued re-reads old rows.
+    drop_cached()
+    await _db_write(_db_exec, "DELETE FROM balances WHERE guild = ?", (gid,))
+    drop_cached()
+
+def last_daily_get(guild_id: int, user_id: int) -> int:
+    rows = _db_query("SELECT ts FROM last_daily WHERE guild = ? AND user = ?", (int(guild_id), int(user_id)))
+    return int(rows[0][0]) if rows else 0
+
+DAILY_COOLDOWN = 23*3600 + 30*60
+
+async def last_daily_claim(guild_id: int, user_id: int, ts: int) -> bool:
+    """Record a daily claim at ts unless one was made within DAILY_COOLDOWN; True if it was recorded."""
+    changed = await _db_write(_db_exec, "INSERT INTO last_daily (guild, user, ts) VALUES (?, ?, ?) "
+                                        "ON CONFLICT(guild, user) DO UPDATE SET ts = excluded.ts "
+                                        "WHERE last_daily.ts <= ?",
+                              (int(guild_id), int(user_id), int(ts), int(ts) - DAILY_COOLDOWN))
+    return changed > 0
+
+@functools.lru_cache(maxsize=4096)
 def _fmt_currency(n: int, symbol: str) -> str:
     return f"{symbol}{n:,}" if symbol.strip() != "" else f"{n:,}"
 
@@ -462,6 +926,16 @@ def _get_banker_role_id(guild_id: int) -> Optional[int]:
     val = guild_setting(guild_id, "BANKER_ROLE_ID", None)
     return int(val) if val else None
 
+# Mentions are stored next to the ids when they're set, so summaries never resolve
+# channel/role objects; settings saved before that fall back to the raw mention syntax.
+def _gambling_channel_mention(guild_id: int) -> Optional[str]:
+    chan_id = _get_gambling_channel_id(guild_id)
+    return (guild_setting(guild_id, "GAMBLING_CHANNEL_MENTION", None) or f"<#{chan_id}>") if chan_id else None
+
+def _banker_role_mention(guild_id: int) -> Optional[str]:
+    role_id = _get_banker_role_id(guild_id)
+    return (guild_setting(guild_id, "BANKER_ROLE_MENTION", None) or f"<@&{role_id}>") if role_id else None
+
 def user_is_banker(inter: discord.Interaction) -> bool:
     if not inter.guild:
         return False
@@ -492,8 +966,7 @@ def in_gambling_channel():
             return True
         if inter.channel and inter.channel.id == int(allowed_id):
             return True
-        chan = inter.guild.get_channel(int(allowed_id))
-        where = chan.mention if chan else f"<#{allowed_id}>"
+        where = _gambling_channel_mention(inter.guild.id)
         raise app_commands.CheckFailure(f"Gambling commands are restricted to {where}.")
     return app_commands.check(predicate)
 
@@ -523,6 +996,7 @@ async def _on_app_error(inter: discord.Interaction, error: app_commands.AppComma
 @app_commands.checks.has_permissions(manage_guild=True)
 async def sync_cmd(interaction: discord.Interaction):
     try:
+        await _flush_json()
         await tree.sync(guild=interaction.guild)
         await interaction.response.send_message("✅ Synced slash commands to this server.", ephemeral=True)
     except Exception as e:
@@ -538,9 +1012,12 @@ class UnitsPager(discord.ui.View):
         self.items = items
         self.idx = max(0, start)
         self.per = 20
+        # items never change for the life of the view, so page count and page text are computed once.
+        self.n_pages = max(1, math.ceil(len(items)/self.per))
+        self._desc: Dict[int, str] = {}
         self.update_state()
     def page(self) -> int: return self.idx // self.per
-    def pages(self) -> int: return max(1, math.ceil(len(self.items)/self.per))
+    def pages(self) -> int: return self.n_pages
     def slice(self) -> List[str]:
         s = self.page() * self.per
         return self.items[s:s+self.per]
@@ -559,8 +1036,10 @@ class UnitsPager(discord.ui.View):
         await inter.response.edit_message(**self._render())
     def _render(self):
         page = self.page()+1; pages = self.pages()
-        s = self.slice(); start_idx = (page-1)*self.per + 1
-        desc = "\n".join(f"{i}. {name}" for i, name in enumerate(s, start_idx)) or "_empty_"
+        desc = self._desc.get(page)
+        if desc is None:
+            start_idx = (page-1)*self.per + 1
+            desc = self._desc[page] = "\n".join(f"{i}. {name}" for i, name in enumerate(self.slice(), start_idx)) or "_empty_"
         embed = discord.Embed(title=f"Units (page {page}/{pages})", description=desc, color=0x5865F2)
         embed.set_footer(text=f"{len(self.items)} total units — tip: /unit name:<unit> for details")
         return {"embed": embed, "view": self}
@@ -572,10 +1051,9 @@ async def units_cmd(interaction: discord.Interaction, name: Optional[str] = None
         u = find_unit(name)
         if not u:
             return await interaction.response.send_message(f"Couldn't find a unit named **{name}**.", ephemeral=True)
-        img = compose_unit_panel(u)
-        if img:
-            file = discord.File(io.BytesIO(img), filename="unit.png")
-            embed = discord.Embed(title=u, color=0x2ECC71); embed.set_image(url="attachment://unit.png")
+        file = await _run_blocking(unit_panel_file, u)
+        if file:
+            embed = discord.Embed(title=u, color=0x2ECC71); embed.set_image(url=f"attachment://{file.filename}")
             await interaction.response.send_message(embed=embed, file=file)
         else:
             await interaction.response.send_message(f"**{u}** — no images found in {ASSETS_DIR}", ephemeral=True)
@@ -589,10 +1067,9 @@ async def units_cmd(interaction: discord.Interaction, name: Optional[str] = None
 @tree.command(name="unit", description="Show a unit's picture (and stats if available)")
 async def unit_cmd(interaction: discord.Interaction, name: str):
     u = find_unit(name) or name
-    img = compose_unit_panel(u)
-    if not img: return await interaction.response.send_message(f"No images found for **{u}** in `{ASSETS_DIR}`.", ephemeral=True)
-    file = discord.File(io.BytesIO(img), filename="unit.png")
-    embed = discord.Embed(title=u, color=0x2ECC71); embed.set_image(url="attachment://unit.png")
+    file = await _run_blocking(unit_panel_file, u)
+    if not file: return await interaction.response.send_message(f"No images found for **{u}** in `{ASSETS_DIR}`.", ephemeral=True)
+    embed = discord.Embed(title=u, color=0x2ECC71); embed.set_image(url=f"attachment://{file.filename}")
     await interaction.response.send_message(embed=embed, file=file)
 
 class WheelView(discord.ui.View):
@@ -603,8 +1080,8 @@ class WheelView(discord.ui.View):
         units = read_units_txt()
         if not units: return await inter.response.send_message("No units found.", ephemeral=True)
         choice = random.choice(units); self.chosen = choice
-        img = compose_unit_panel(choice); files = []; embed = discord.Embed(title="🎁 Winner", description=choice, color=0xF1C40F)
-        if img: files.append(discord.File(io.BytesIO(img), filename="winner.png")); embed.set_image(url="attachment://winner.png")
+        file = await _run_blocking(unit_panel_file, choice, "winner"); files = []; embed = discord.Embed(title="🎁 Winner", description=choice, color=0xF1C40F)
+        if file: files.append(file); embed.set_image(url=f"attachment://{file.filename}")
         await inter.response.edit_message(embed=embed, attachments=files)
 
 @tree.command(name="wheel", description="Spin a case and pick a random unit")
@@ -639,22 +1116,64 @@ async def values_cmd(interaction: discord.Interaction):
     await interaction.response.send_message(embed=embed, ephemeral=True)
 
 # -------------------- Ingest attachments --------------------
+# Control characters and :"<>| are dropped; underscores become spaces when UNDERSCORE_TO_SPACE
+# is on (resolved at startup), so sanitizing is a single translate pass.
+_FILENAME_BAD = dict.fromkeys([*range(32), *map(ord, ':"<>|')])
+if _UNDERSCORE_TO_SPACE:
+    _FILENAME_BAD[ord("_")] = " "
+
 def _sanitize_filename(name: str) -> str:
     name = name.replace("\\", "/").split("/")[-1]
-    if CONFIG.get("UNDERSCORE_TO_SPACE", True): name = name.replace("_", " ")
-    return "".join(ch for ch in name if ch >= " " and ch not in ':"<>|')
+    return name.translate(_FILENAME_BAD)
+
+# Uploads are streamed in chunks of this size rather than read whole into memory, and
+# buffered up to INGEST_WRITE_BATCH so each executor hop writes a few MiB at once.
+INGEST_CHUNK = 256 * 1024
+INGEST_WRITE_BATCH = 4 * 1024 * 1024
+
+async def _download_to(session: aiohttp.ClientSession, url: str, path: str) -> None:
+    """Stream url into path via a .part file, so a half-written upload is never picked up."""
+    await _run_blocking(_ensure_dir, os.path.dirname(path) or ".")
+    # A unique temp name per download: two uploads can map to the same path (units.txt and
+    # units_v2.txt both land on UNITS_TXT), and must not write into one shared .part file.
+    tmp = f"{path}.{os.urandom(6).hex()}.part"
+    f = await _run_blocking(open, tmp, "xb")
+    try:
+        async with session.get(url, proxy=bot.http.proxy, proxy_auth=bot.http.proxy_auth) as resp:
+            resp.raise_for_status()
+            buf = bytearray()
+            async for chunk in resp.content.iter_chunked(INGEST_CHUNK):
+                buf += chunk
+                if len(buf) >= INGEST_WRITE_BATCH:
+                    await _run_blocking(f.write, buf)
+                    buf = bytearray()
+            if buf:
+                await _run_blocking(f.write, buf)
+    except BaseException:
+        f.close()
+        try: os.remove(tmp)
+        except OSError: pass
+        raise
+    f.close()
+    await _run_blocking(os.replace, tmp, path)
 
-async def _save_attachment(att: discord.Attachment) -> str:
-    data = await att.read()
+def _invalidate_caches_for(path: str) -> None:
+    """Drop the cached parse of a file we just rewrote rather than trusting its (mtime, size)."""
+    if path == UNITS_TXT: _UNITS_CACHE["mtime"] = None
+    elif path == ALIASES_JSON: _ALIASES_CACHE["mtime"] = None
+    elif os.path.dirname(path) == ASSETS_DIR: _asset_index_add(path)
+
+async def _save_attachment(session: aiohttp.ClientSession, att: discord.Attachment) -> str:
     safe = _sanitize_filename(att.filename); ext = os.path.splitext(safe)[1].lower()
-    if ext in (".png",".jpg",".jpeg",".webp",".gif"): out = os.path.join(ASSETS_DIR, safe)
+    if ext in (".png",".jpg",".jpeg",".webp",".gif"):
+        out = os.path.join(ASSETS_DIR, safe)
+        # Bring the index up to date first so the new file can be added to it in place.
+        await _run_blocking(_asset_index)
     elif ext == ".txt": out = UNITS_TXT if "units" in safe.lower() else os.path.join(OUTPUT_DIR, safe)
     elif ext == ".json": out = ALIASES_JSON if "aliases" in safe.lower() else os.path.join(OUTPUT_DIR, safe)
     else: out = os.path.join(OUTPUT_DIR, safe)
-    os.makedirs(os.path.dirname(out) or ".", exist_ok=True)
-    with open(out, "wb") as f: f.write(data)
-    if out.endswith(ALIASES_JSON):
-        global ALIASES; ALIASES = load_aliases()
+    await _download_to(session, att.url, out)
+    _invalidate_caches_for(out)
     return out
 
 @tree.command(name="ingest", description="Upload & save files (images, units.txt, aliases.json, etc.)")
@@ -664,12 +1183,23 @@ async def ingest_cmd(interaction: discord.Interaction, file1: Optional[discord.A
                      file3: Optional[discord.Attachment]=None, file4: Optional[discord.Attachment]=None, file5: Optional[discord.Attachment]=None,
                      file6: Optional[discord.Attachment]=None, file7: Optional[discord.Attachment]=None, file8: Optional[discord.Attachment]=None,
                      file9: Optional[discord.Attachment]=None, file10: Optional[discord.Attachment]=None):
-    files = [f for f in (file1,file2,file3,file4,file5,file6,file7,file8,file9,file10) if f is not None]
+    files = list(filter(None, (file1,file2,file3,file4,file5,file6,file7,file8,file9,file10)))
     if not files: return await interaction.response.send_message("Please supply one or more attachments via the options.", ephemeral=True)
-    saved = []
-    for att in files[:10]:
-        path = await _save_attachment(att); saved.append(os.path.basename(path))
-    await interaction.response.send_message(f"Saved: {', '.join(saved)}", ephemeral=True)
+    # Downloads can outlast Discord's 3s acknowledgement window, so acknowledge first.
+    await interaction.response.defer(ephemeral=True)
+    # One bad upload shouldn't discard the others, so failures come back as results.
+    # One session for the whole batch, so the downloads share its connection pool;
+    # _download_to routes requests through the bot client's proxy settings.
+    async with aiohttp.ClientSession() as session:
+        results = await asyncio.gather(*(_save_attachment(session, att) for att in files), return_exceptions=True)
+    # Re-parse units.txt / re-scan the asset folder here, off the loop, rather than
+    # in whichever spawn or quiz command first notices the change.
+    await _run_blocking(spawnable_units)
+    saved = [os.path.basename(r) for r in results if isinstance(r, str)]
+    failed = [att.filename for att, r in zip(files, results) if isinstance(r, BaseException)]
+    msg = f"Saved: {', '.join(saved) or 'nothing'}"
+    if failed: msg += f"\nFailed: {', '.join(failed)}"
+    await interaction.followup.send(msg, ephemeral=True)
 
 # -------------------- Economy basics --------------------
 @tree.command(name="daily", description="Claim your daily reward")
@@ -678,12 +1208,13 @@ async def daily_cmd(interaction: discord.Interaction):
     if not guild_setting(interaction.guild.id, "GAMBLING_ENABLED", True):
         return await interaction.response.send_message("Gambling is disabled here.", ephemeral=True)
     _,_,_,daily,curr = _limits(interaction.guild.id)
-    last = ECON["last_daily"].setdefault(str(interaction.guild.id), {}).get(str(interaction.user.id), 0)
     now = _now_ts()
-    if now - last < 23*3600 + 30*60:
-        remain = (23*3600 + 30*60) - (now - last)
+    # The claim checks the cooldown and stamps it in one statement, so two concurrent
+    # /daily calls can't both get past the check and both pay out.
+    if not await last_daily_claim(interaction.guild.id, interaction.user.id, now):
+        last = last_daily_get(interaction.guild.id, interaction.user.id)
+        remain = max(0, DAILY_COOLDOWN - (now - last))
         return await interaction.response.send_message(f"You already claimed daily. Try again in **{remain//3600}h {(remain%3600)//60}m**.", ephemeral=True)
-    ECON["last_daily"].setdefault(str(interaction.guild.id), {})[str(interaction.user.id)] = now
     new_bal = await eco_add(interaction.guild.id, interaction.user.id, daily)
     await interaction.response.send_message(f"You received **{_fmt_currency(daily, curr)}**. Balance: **{_fmt_currency(new_bal, curr)}**.", ephemeral=True)
 
@@ -707,7 +1238,7 @@ async def coinflip_cmd(interaction: discord.Interaction, side: str, bet: int):
     min_bet, max_bet, edge, _, curr = _limits(interaction.guild.id)
     if not (min_bet <= bet <= max_bet): return await interaction.response.send_message(f"Bet must be between {min_bet} and {max_bet}.", ephemeral=True)
     if eco_get(interaction.guild.id, interaction.user.id) < bet: return await interaction.response.send_message("Insufficient balance.", ephemeral=True)
-    res = random.choice(("heads", "tails"))
+    res = "heads" if random.random() < 0.5 else "tails"
     if res == side:
         win = int(round(bet * (2.0 - edge))); new_bal = await eco_add(interaction.guild.id, interaction.user.id, win)
         log_history(interaction.guild.id, interaction.user.id, "coinflip", bet, win)
@@ -717,7 +1248,7 @@ async def coinflip_cmd(interaction: discord.Interaction, side: str, bet: int):
         log_history(interaction.guild.id, interaction.user.id, "coinflip", bet, -bet)
         await interaction.response.send_message(f"🪙 **{res.upper()}**. {interaction.user.mention} lost **{_fmt_currency(bet, curr)}**. Balance: **{_fmt_currency(new_bal, curr)}**.")
 
-SLOT_EMOJI = ["🍒", "🍋", "🍇", "🔔", "⭐"]
+SLOT_EMOJI = ("🍒", "🍋", "🍇", "🔔", "⭐")
 @tree.command(name="slots", description="Slots (3 reels) – 3x ≈9x, 2 in a row ≈2x (minus edge)")
 @in_gambling_channel()
 @app_commands.describe(bet="bet amount")
@@ -727,7 +1258,7 @@ async def slots_cmd(interaction: discord.Interaction, bet: int):
     min_bet, max_bet, edge, _, curr = _limits(interaction.guild.id)
     if not (min_bet <= bet <= max_bet): return await interaction.response.send_message(f"Bet must be between {min_bet} and {max_bet}.", ephemeral=True)
     if eco_get(interaction.guild.id, interaction.user.id) < bet: return await interaction.response.send_message("Insufficient balance.", ephemeral=True)
-    reels = [random.choice(SLOT_EMOJI) for _ in range(3)]
+    reels = random.choices(SLOT_EMOJI, k=3)
     text = " | ".join(reels); win = 0
     if len(set(reels)) == 1: win = int(round(bet * (9.0 - edge)))
     elif reels[0] == reels[1] or reels[1] == reels[2]: win = int(round(bet * (2.0 - edge)))
@@ -783,6 +1314,11 @@ async def roulette_cmd(interaction: discord.Interaction, bet: int, choice: str):
         new_bal = await eco_add(interaction.guild.id, interaction.user.id, -bet); log_history(interaction.guild.id, interaction.user.id, "roulette", bet, -bet)
         await interaction.response.send_message(f"🎡 {interaction.user.mention} → {num} ({color}) — lost **{_fmt_currency(bet,curr)}**. Balance: **{_fmt_currency(new_bal,curr)}**")
 
+# Four-deck shoe. A round never sees more than a few dozen cards, so each game deals
+# from a random.sample of the shoe instead of shuffling all 208 cards.
+_BJ_SHOE = tuple(f"{r}{s}" for r in ("A","2","3","4","5","6","7","8","9","10","J","Q","K") for s in ("♠","♥","♦","♣")) * 4
+_BJ_DEAL = 52
+
 @tree.command(name="blackjack", description="Blackjack vs dealer")
 @in_gambling_channel()
 @app_commands.describe(bet="bet amount")
@@ -792,8 +1328,7 @@ async def blackjack_cmd(interaction: discord.Interaction, bet: int):
     if not (min_bet <= bet <= max_bet): return await interaction.response.send_message(f"Bet must be between {min_bet} and {max_bet}.", ephemeral=True)
     if eco_get(interaction.guild.id, interaction.user.id) < bet: return await interaction.response.send_message("Insufficient balance.", ephemeral=True)
 
-    ranks = ["A","2","3","4","5","6","7","8","9","10","J","Q","K"]; suits = ["♠","♥","♦","♣"]
-    deck = [f"{r}{s}" for r in ranks for s in suits] * 4; random.shuffle(deck)
+    deck = random.sample(_BJ_SHOE, _BJ_DEAL)
 
     def card_value(hand: List[str]) -> int:
         v = 0; aces = 0
@@ -808,7 +1343,12 @@ async def blackjack_cmd(interaction: discord.Interaction, bet: int):
     player = [deck.pop(), deck.pop()]; dealer = [deck.pop(), deck.pop()]
 
     class BJView(discord.ui.View):
-        def __init__(self): super().__init__(timeout=90); self.current_bet = bet; self.finished = False
+        def __init__(self): super().__init__(timeout=90); self.current_bet = bet; self.finished = False; self._lock = asyncio.Lock()
+        async def busy(self, inter: discord.Interaction) -> bool:
+            """Acknowledge and drop clicks after the round settles or while another click is running."""
+            if self.finished or self._lock.locked():
+                await inter.response.defer(); return True
+            return False
         async def finish(self, inter: discord.Interaction, outcome: str, delta: int):
             if self.finished: return
             self.finished = True
@@ -822,31 +1362,37 @@ async def blackjack_cmd(interaction: discord.Interaction, bet: int):
             await inter.response.edit_message(embed=em, view=self)
         @discord.ui.button(label="Hit", style=discord.ButtonStyle.primary)
         async def hit(self, inter: discord.Interaction, _btn: discord.ui.Button):
-            player.append(deck.pop()); pval = card_value(player)
-            if pval > 21: return await self.finish(inter, f"💥 Bust! Lost **{_fmt_currency(self.current_bet,curr)}**.", -self.current_bet)
-            em = discord.Embed(title="♦️ Blackjack", description=f"{interaction.user.mention}\nYour: {' | '.join(player)} (**{pval}**)\nDealer: {dealer[0]} ??\nBet: **{_fmt_currency(self.current_bet,curr)}**", color=0x2ECC71)
-            await inter.response.edit_message(embed=em, view=self)
+            if await self.busy(inter): return
+            async with self._lock:
+                player.append(deck.pop()); pval = card_value(player)
+                if pval > 21: return await self.finish(inter, f"💥 Bust! Lost **{_fmt_currency(self.current_bet,curr)}**.", -self.current_bet)
+                em = discord.Embed(title="♦️ Blackjack", description=f"{interaction.user.mention}\nYour: {' | '.join(player)} (**{pval}**)\nDealer: {dealer[0]} ??\nBet: **{_fmt_currency(self.current_bet,curr)}**", color=0x2ECC71)
+                await inter.response.edit_message(embed=em, view=self)
         @discord.ui.button(label="Stand", style=discord.ButtonStyle.secondary)
         async def stand(self, inter: discord.Interaction, _btn: discord.ui.Button):
-            while card_value(dealer) < 17: dealer.append(deck.pop())
-            pval, dval = card_value(player), card_value(dealer)
-            if dval > 21 or pval > dval:
-                win = int(round(self.current_bet * (2.0 - edge))); return await self.finish(inter, f"✅ You win **{_fmt_currency(win,curr)}**!", win)
-            elif pval == dval:
-                return await self.finish(inter, "➖ Push.", 0)
-            else:
-                return await self.finish(inter, f"❌ Dealer wins. Lost **{_fmt_currency(self.current_bet,curr)}**.", -self.current_bet)
+            if await self.busy(inter): return
+            async with self._lock:
+                while card_value(dealer) < 17: dealer.append(deck.pop())
+                pval, dval = card_value(player), card_value(dealer)
+                if dval > 21 or pval > dval:
+                    win = int(round(self.current_bet * (2.0 - edge))); return await self.finish(inter, f"✅ You win **{_fmt_currency(win,curr)}**!", win)
+                elif pval == dval:
+                    return await self.finish(inter, "➖ Push.", 0)
+                else:
+                    return await self.finish(inter, f"❌ Dealer wins. Lost **{_fmt_currency(self.current_bet,curr)}**.", -self.current_bet)
         @discord.ui.button(label="Double", style=discord.ButtonStyle.success)
         async def double(self, inter: discord.Interaction, _btn: discord.ui.Button):
-            if eco_get(inter.guild.id, inter.user.id) < self.current_bet: return await inter.response.send_message("Not enough balance to double.", ephemeral=True)
-            self.current_bet *= 2; player.append(deck.pop())
-            while card_value(dealer) < 17: dealer.append(deck.pop())
-            pval, dval = card_value(player), card_value(dealer)
-            if pval > 21: return await self.finish(inter, f"💥 Bust on double! Lost **{_fmt_currency(self.current_bet,curr)}**.", -self.current_bet)
-            if dval > 21 or pval > dval:
-                win = int(round(self.current_bet * (2.0 - edge))); return await self.finish(inter, f"✅ You win **{_fmt_currency(win,curr)}**!", win)
-            elif pval == dval: return await self.finish(inter, "➖ Push.", 0)
-            else: return await self.finish(inter, f"❌ Dealer wins. Lost **{_fmt_currency(self.current_bet,curr)}**.", -self.current_bet)
+            if await self.busy(inter): return
+            async with self._lock:
+                if eco_get(inter.guild.id, inter.user.id) < self.current_bet: return await inter.response.send_message("Not enough balance to double.", ephemeral=True)
+                self.current_bet *= 2; player.append(deck.pop())
+                while card_value(dealer) < 17: dealer.append(deck.pop())
+                pval, dval = card_value(player), card_value(dealer)
+                if pval > 21: return await self.finish(inter, f"💥 Bust on double! Lost **{_fmt_currency(self.current_bet,curr)}**.", -self.current_bet)
+                if dval > 21 or pval > dval:
+                    win = int(round(self.current_bet * (2.0 - edge))); return await self.finish(inter, f"✅ You win **{_fmt_currency(win,curr)}**!", win)
+                elif pval == dval: return await self.finish(inter, "➖ Push.", 0)
+                else: return await self.finish(inter, f"❌ Dealer wins. Lost **{_fmt_currency(self.current_bet,curr)}**.", -self.current_bet)
 
     start = discord.Embed(title="♦️ Blackjack", description=f"{interaction.user.mention}\nYour: {' | '.join(player)} (**{card_value(player)}**)\nDealer: {dealer[0]} ??\nBet: **{_fmt_currency(bet, curr)}**", color=0x2ECC71)
     await interaction.response.send_message(embed=start, view=BJView())
@@ -864,8 +1410,11 @@ async def crash_cmd(interaction: discord.Interaction, bet: int):
     if eco_get(interaction.guild.id, interaction.user.id) < bet:
         return await interaction.response.send_message("Insufficient balance.", ephemeral=True)
     MIN_CASHOUT = 1.25
+    TICK = 0.9
     multiplier = 1.0
     bust_at = 1.05 + (random.random() ** 3.0) * 2.95
+    # Edit through the interaction webhook; original_response() would cost an extra GET.
+    editor = ThrottledEditor(interaction.edit_original_response)
     class CrashView(discord.ui.View):
         def __init__(self):
             super().__init__(timeout=25)
@@ -883,22 +1432,32 @@ async def crash_cmd(interaction: discord.Interaction, bet: int):
             new_bal = await eco_add(interaction.guild.id, interaction.user.id, win)
             log_history(interaction.guild.id, interaction.user.id, "crash", bet, win)
             em = discord.Embed(title="🚀 Crash", description=(f"{interaction.user.mention} cashed at **{multiplier:.2f}x** — won **{_fmt_currency(win, curr)}**.\nBalance: **{_fmt_currency(new_bal, curr)}**"))
+            # The round is settled; stop queued tick frames from landing over the result.
+            editor.close()
             await inter.response.edit_message(embed=em, view=None)
     view = CrashView()
     await interaction.response.send_message(embed=discord.Embed(title="🚀 Crash", description=(f"{interaction.user.mention} started a round. Rising... press **Cash Out** after **{MIN_CASHOUT:.2f}x**!")), view=view)
-    msg = await interaction.original_response()
+    # Only the multiplier changes between ticks; format the rest once.
+    tick_head = f"**{interaction.user.mention}** Multiplier: **"
+    tick_tail = f"x**\nCash out before 💥 (min **{MIN_CASHOUT:.2f}x**)!"
+    # Ticks run off a monotonic deadline so slow edits don't stretch the round.
+    loop = asyncio.get_running_loop(); next_tick = loop.time()
     while not view.cashed:
-        await asyncio.sleep(0.9)
+        next_tick += TICK
+        await asyncio.sleep(max(0.0, next_tick - loop.time()))
         if view.cashed:
             return
         multiplier *= 1 + random.uniform(0.06, 0.22)
         if multiplier >= bust_at:
             break
-        await msg.edit(embed=discord.Embed(title="🚀 Crash", description=(f"**{interaction.user.mention}** Multiplier: **{multiplier:.2f}x**\nCash out before 💥 (min **{MIN_CASHOUT:.2f}x**)!")), view=view)
+        await editor.maybe_edit(embed=discord.Embed(title="🚀 Crash", description=f"{tick_head}{multiplier:.2f}{tick_tail}"), view=view)
     if not view.cashed:
+        # Settle the view before the first await: a Cash Out click while the loss is being
+        # written would otherwise see the bust multiplier and pay out as well.
+        view.cashed = True; view.stop()
         new_bal = await eco_add(interaction.guild.id, interaction.user.id, -bet)
         log_history(interaction.guild.id, interaction.user.id, "crash", bet, -bet)
-        await msg.edit(embed=discord.Embed(title="💥 Crash", description=(f"{interaction.user.mention} — crashed at **{multiplier:.2f}x** and lost **{_fmt_currency(bet, curr)}**.\nBalance: **{_fmt_currency(new_bal, curr)}**")), view=None)
+        await editor.flush(embed=discord.Embed(title="💥 Crash", description=(f"{interaction.user.mention} — crashed at **{multiplier:.2f}x** and lost **{_fmt_currency(bet, curr)}**.\nBalance: **{_fmt_currency(new_bal, curr)}**")), view=None)
 
 @tree.command(name="hilo", description="Hi/Lo — guess if the next card is higher or lower")
 @in_gambling_channel()
@@ -969,7 +1528,7 @@ async def give_cmd(interaction: discord.Interaction, user: discord.Member, amoun
     if user.bot or user.id == interaction.user.id: return await interaction.response.send_message("Invalid recipient.", ephemeral=True)
     if amount <= 0: return await interaction.response.send_message("Amount must be > 0.", ephemeral=True)
     if eco_get(interaction.guild.id, interaction.user.id) < amount: return await interaction.response.send_message("Insufficient balance.", ephemeral=True)
-    await eco_add(interaction.guild.id, interaction.user.id, -amount); new_bal = await eco_add(interaction.guild.id, user.id, amount)
+    new_bal = await eco_transfer(interaction.guild.id, interaction.user.id, user.id, amount)
     _,_,_,_,curr = _limits(interaction.guild.id)
     log_history(interaction.guild.id, interaction.user.id, "give", amount, -amount); log_history(interaction.guild.id, user.id, "give", amount, amount)
     await interaction.response.send_message(f"💸 {interaction.user.mention} transferred **{_fmt_currency(amount, curr)}** to {user.mention}. (Recipient balance: **{_fmt_currency(new_bal, curr)}**)")
@@ -977,15 +1536,18 @@ async def give_cmd(interaction: discord.Interaction, user: discord.Member, amoun
 @tree.command(name="leaderboard", description="Top 10 balances")
 @in_gambling_channel()
 async def leaderboard_cmd(interaction: discord.Interaction):
-    g = str(interaction.guild.id); _,_,_,_,curr = _limits(interaction.guild.id)
-    board = sorted(ECON["balances"].get(g, {}).items(), key=lambda kv: kv[1], reverse=True)[:10]
+    _,_,_,_,curr = _limits(interaction.guild.id)
+    board = await _run_blocking(eco_top, interaction.guild.id, 10)
     lines = []
     for i, (uid, amt) in enumerate(board, 1):
-        member = interaction.guild.get_member(int(uid)); name = member.mention if member else f"<@{uid}>"
+        name = f"<@{uid}>"
         lines.append(f"**{i}.** {name} — {_fmt_currency(amt, curr)}")
     embed = discord.Embed(title="Leaderboard", description="\n".join(lines) or "_No balances yet_", color=0xE67E22)
     await interaction.response.send_message(embed=embed)
 
+_SETTINGS_SUMMARY_TPL = ("Settings for **{name}**:\nEnabled: {en}\nCurrency: {cur} | Min: {mn} | Max: {mx}\n"
+                         "Edge: {edge:.1f}% | Daily: {da}\nGambling channel: {ch}\nBanker role: {br}")
+
 @tree.command(name="gambling_settings", description="Admin: configure gambling settings")
 @app_commands.checks.has_permissions(manage_guild=True)
 @app_commands.describe(enabled="Enable/disable gambling", currency="Currency symbol", min_bet="Minimum bet", max_bet="Maximum bet",
@@ -995,23 +1557,32 @@ async def gambling_settings_cmd(interaction: discord.Interaction, enabled: Optio
                                 min_bet: Optional[int]=None, max_bet: Optional[int]=None, house_edge: Optional[float]=None,
                                 daily: Optional[int]=None, channel: Optional[discord.TextChannel]=None, clear_channel: Optional[bool]=None,
                                 banker_role: Optional[discord.Role]=None, clear_banker_role: Optional[bool]=None):
-    if enabled is not None: set_guild_setting(interaction.guild.id, "GAMBLING_ENABLED", bool(enabled))
-    if currency is not None: set_guild_setting(interaction.guild.id, "CURRENCY", currency[:3])
-    if min_bet is not None: set_guild_setting(interaction.guild.id, "MIN_BET", int(min_bet))
-    if max_bet is not None: set_guild_setting(interaction.guild.id, "MAX_BET", int(max_bet))
+    guild = interaction.guild; gid = guild.id
+    pending: Dict[str, object] = {}
+    if enabled is not None: pending["GAMBLING_ENABLED"] = bool(enabled)
+    if currency is not None: pending["CURRENCY"] = currency[:3]
+    if min_bet is not None: pending["MIN_BET"] = int(min_bet)
+    if max_bet is not None: pending["MAX_BET"] = int(max_bet)
     if house_edge is not None:
-        edge = house_edge if house_edge < 1 else (house_edge/100.0); set_guild_setting(interaction.guild.id, "HOUSE_EDGE", float(edge))
-    if daily is not None: set_guild_setting(interaction.guild.id, "DAILY_AMOUNT", int(daily))
-    if channel is not None: set_guild_setting(interaction.guild.id, "GAMBLING_CHANNEL_ID", int(channel.id))
-    if clear_channel: set_guild_setting(interaction.guild.id, "GAMBLING_CHANNEL_ID", None)
-    if banker_role is not None: set_guild_setting(interaction.guild.id, "BANKER_ROLE_ID", int(banker_role.id))
-    if clear_banker_role: set_guild_setting(interaction.guild.id, "BANKER_ROLE_ID", None)
-    min_bet, max_bet, edge, daily_amt, curr = _limits(interaction.guild.id)
-    chan_id = _get_gambling_channel_id(interaction.guild.id); chan_ref = interaction.guild.get_channel(chan_id) if chan_id else None
-    chan_txt = chan_ref.mention if chan_ref else "Any channel"
-    br_id = _get_banker_role_id(interaction.guild.id); br_ref = interaction.guild.get_role(br_id) if br_id else None
-    br_txt = br_ref.mention if br_ref else "Manage Server only"
-    await interaction.response.send_message(f"Settings for **{interaction.guild.name}**:\nEnabled: {guild_setting(interaction.guild.id,'GAMBLING_ENABLED',True)}\nCurrency: {curr} | Min: {min_bet} | Max: {max_bet}\nEdge: {edge*100:.1f}% | Daily: {daily_amt}\nGambling channel: {chan_txt}\nBanker role: {br_txt}", ephemeral=True)
+        edge = house_edge if house_edge < 1 else (house_edge/100.0); pending["HOUSE_EDGE"] = float(edge)
+    if daily is not None: pending["DAILY_AMOUNT"] = int(daily)
+    if channel is not None: pending.update(GAMBLING_CHANNEL_ID=int(channel.id), GAMBLING_CHANNEL_MENTION=channel.mention)
+    if clear_channel: pending.update(GAMBLING_CHANNEL_ID=None, GAMBLING_CHANNEL_MENTION=None)
+    if banker_role is not None: pending.update(BANKER_ROLE_ID=int(banker_role.id), BANKER_ROLE_MENTION=banker_role.mention)
+    if clear_banker_role: pending.update(BANKER_ROLE_ID=None, BANKER_ROLE_MENTION=None)
+    if pending:
+        # Only a write needs the ACK up front; a pure view answers straight from the cache.
+        await interaction.response.defer(ephemeral=True)
+        await aset_guild_settings_bulk(gid, pending)
+    min_bet, max_bet, edge, daily_amt, curr = _limits(gid)
+    vals = guild_settings_many(gid, ("GAMBLING_ENABLED", "GAMBLING_CHANNEL_ID", "GAMBLING_CHANNEL_MENTION", "BANKER_ROLE_ID", "BANKER_ROLE_MENTION"))
+    chan_id, br_id = vals["GAMBLING_CHANNEL_ID"], vals["BANKER_ROLE_ID"]
+    chan_txt = (vals["GAMBLING_CHANNEL_MENTION"] or f"<#{chan_id}>") if chan_id else "Any channel"
+    br_txt = (vals["BANKER_ROLE_MENTION"] or f"<@&{br_id}>") if br_id else "Manage Server only"
+    enabled = vals["GAMBLING_ENABLED"]
+    summary = _SETTINGS_SUMMARY_TPL.format(name=guild.name, en=True if enabled is None else enabled,
+                                           cur=curr, mn=min_bet, mx=max_bet, edge=edge*100, da=daily_amt, ch=chan_txt, br=br_txt)
+    await send_text(interaction, summary)
 
 @tree.command(name="grant", description="(Admin/Banker) Grant coins to a user")
 @in_gambling_channel()
@@ -1019,10 +1590,11 @@ async def gambling_settings_cmd(interaction: discord.Interaction, enabled: Optio
 async def grant_cmd(interaction: discord.Interaction, user: discord.Member, amount: app_commands.Range[int, 1, 100000000], reason: Optional[str]=None):
     if not interaction.guild or user.bot: return await interaction.response.send_message("Invalid recipient.", ephemeral=True)
     if not user_is_banker(interaction): return await interaction.response.send_message("You need Manage Server or the configured Banker role.", ephemeral=True)
-    new_bal = await eco_add(interaction.guild.id, user.id, int(amount)); _,_,_,_,curr = _limits(interaction.guild.id)
-    note = f" Reason: {reason}" if reason else ""; log_history(interaction.guild.id, interaction.user.id, "grant", int(amount), -int(amount))
-    log_history(interaction.guild.id, user.id, "grant", int(amount), int(amount))
-    await interaction.response.send_message(f"Added **{_fmt_currency(int(amount), curr)}** to {user.mention}. New balance: **{_fmt_currency(new_bal, curr)}**.{note}", ephemeral=True)
+    gid = interaction.guild.id; amt = int(amount)
+    new_bal = await eco_add(gid, user.id, amt); _,_,_,_,curr = _limits(gid)
+    note = f" Reason: {reason}" if reason else ""; log_history(gid, interaction.user.id, "grant", amt, -amt)
+    log_history(gid, user.id, "grant", amt, amt)
+    await interaction.response.send_message(f"Added **{_fmt_currency(amt, curr)}** to {user.mention}. New balance: **{_fmt_currency(new_bal, curr)}**.{note}", ephemeral=True)
 
 # -------------------- Editable Redeem System --------------------
 def _redeem_bucket(guild_id: int) -> Dict[str, dict]:
@@ -1149,10 +1721,8 @@ async def redeem_list(interaction: discord.Interaction):
 
             if has_images:
                 path_img = images[j % len(images)]
-                with open(path_img, "rb") as f_img:
-                    filedata = f_img.read()
                 fname = f"redeem_{i+j}_{os.path.basename(path_img)}"
-                files.append(discord.File(io.BytesIO(filedata), filename=fname))
+                files.append(discord.File(path_img, filename=fname))
                 em.set_thumbnail(url=f"attachment://{fname}")
 
             embeds.append(em)
@@ -1167,7 +1737,7 @@ async def redeem_list(interaction: discord.Interaction):
 async def adminpanel_cmd(interaction: discord.Interaction):
     g = str(interaction.guild.id)
     min_bet, max_bet, edge, daily_amt, curr = _limits(interaction.guild.id)
-    chan_id = _get_gambling_channel_id(interaction.guild.id); chan_txt = interaction.guild.get_channel(chan_id).mention if chan_id else "Any channel"
+    chan_txt = _gambling_channel_mention(interaction.guild.id) or "Any channel"
     enabled = guild_setting(interaction.guild.id, "GAMBLING_ENABLED", True)
     embed = discord.Embed(title=f"Admin Panel — {interaction.guild.name}",
                           description=(f"**Gambling**: {'✅ Enabled' if enabled else '❌ Disabled'}\n"
@@ -1185,12 +1755,14 @@ async def adminpanel_cmd(interaction: discord.Interaction):
             self.add_item(self.currency); self.add_item(self.min_bet_in); self.add_item(self.max_bet_in); self.add_item(self.edge_in); self.add_item(self.daily_in)
         async def on_submit(self, inter: discord.Interaction):
             try:
-                if str(self.currency.value).strip(): set_guild_setting(inter.guild.id, "CURRENCY", str(self.currency.value)[:3])
-                if str(self.min_bet_in.value).strip(): set_guild_setting(inter.guild.id, "MIN_BET", int(self.min_bet_in.value))
-                if str(self.max_bet_in.value).strip(): set_guild_setting(inter.guild.id, "MAX_BET", int(self.max_bet_in.value))
+                pending: Dict[str, object] = {}
+                if str(self.currency.value).strip(): pending["CURRENCY"] = str(self.currency.value)[:3]
+                if str(self.min_bet_in.value).strip(): pending["MIN_BET"] = int(self.min_bet_in.value)
+                if str(self.max_bet_in.value).strip(): pending["MAX_BET"] = int(self.max_bet_in.value)
                 if str(self.edge_in.value).strip():
-                    val = float(self.edge_in.value); set_guild_setting(inter.guild.id, "HOUSE_EDGE", val/100.0 if val >= 1 else val)
-                if str(self.daily_in.value).strip(): set_guild_setting(inter.guild.id, "DAILY_AMOUNT", int(self.daily_in.value))
+                    val = float(self.edge_in.value); pending["HOUSE_EDGE"] = val/100.0 if val >= 1 else val
+                if str(self.daily_in.value).strip(): pending["DAILY_AMOUNT"] = int(self.daily_in.value)
+                await aset_guild_settings_bulk(inter.guild.id, pending)
                 await inter.response.send_message("✅ Settings updated.", ephemeral=True)
             except Exception as e:
                 await inter.response.send_message(f"❌ Failed to update: {e}", ephemeral=True)
@@ -1198,38 +1770,37 @@ async def adminpanel_cmd(interaction: discord.Interaction):
         def __init__(self): super().__init__(timeout=180)
         @discord.ui.button(label="Toggle Gambling", style=discord.ButtonStyle.danger)
         async def toggle(self, inter: discord.Interaction, _btn: discord.ui.Button):
-            cur = guild_setting(inter.guild.id, "GAMBLING_ENABLED", True); set_guild_setting(inter.guild.id, "GAMBLING_ENABLED", not cur)
+            cur = guild_setting(inter.guild.id, "GAMBLING_ENABLED", True); await aset_guild_settings_bulk(inter.guild.id, {"GAMBLING_ENABLED": not cur})
             await inter.response.send_message(f"Gambling now **{'enabled' if not cur else 'disabled'}**.", ephemeral=True)
         @discord.ui.button(label="Edit Settings", style=discord.ButtonStyle.primary)
         async def edit(self, inter: discord.Interaction, _btn: discord.ui.Button): await inter.response.send_modal(LimitsModal())
         @discord.ui.button(label="Set This Channel", style=discord.ButtonStyle.secondary)
         async def setchan(self, inter: discord.Interaction, _btn: discord.ui.Button):
-            set_guild_setting(inter.guild.id, "GAMBLING_CHANNEL_ID", inter.channel.id)
+            await aset_guild_settings_bulk(inter.guild.id, {"GAMBLING_CHANNEL_ID": inter.channel.id, "GAMBLING_CHANNEL_MENTION": inter.channel.mention})
             await inter.response.send_message(f"Gambling channel set to {inter.channel.mention}.", ephemeral=True)
         @discord.ui.button(label="Clear Channel Restriction", style=discord.ButtonStyle.secondary)
         async def clearchan(self, inter: discord.Interaction, _btn: discord.ui.Button):
-            set_guild_setting(inter.guild.id, "GAMBLING_CHANNEL_ID", None); await inter.response.send_message("Gambling channel restriction cleared.", ephemeral=True)
+            await aset_guild_settings_bulk(inter.guild.id, {"GAMBLING_CHANNEL_ID": None, "GAMBLING_CHANNEL_MENTION": None}); await inter.response.send_message("Gambling channel restriction cleared.", ephemeral=True)
         @discord.ui.button(label="Reset Leaderboard", style=discord.ButtonStyle.secondary)
         async def resetlb(self, inter: discord.Interaction, _btn: discord.ui.Button):
-            ECON.setdefault("balances", {})[g] = {}; _save_econ(); await inter.response.send_message("Leaderboard reset.", ephemeral=True)
+            await eco_reset_guild(inter.guild.id); await inter.response.send_message("Leaderboard reset.", ephemeral=True)
         @discord.ui.button(label="View Recent Bets", style=discord.ButtonStyle.success)
         async def viewhist(self, inter: discord.Interaction, _btn: discord.ui.Button):
-            ECON.setdefault("history", {}).setdefault(g, {}); items = []
-            for uid, arr in ECON["history"][g].items():
-                for entry in arr[-10:]: items.append((entry["t"], uid, entry))
-            items.sort(key=lambda x: x[0], reverse=True)
+            ECON.setdefault("history", {}).setdefault(g, {})
+            items = ((entry["t"], uid, entry) for uid, arr in ECON["history"][g].items() for entry in itertools.islice(reversed(arr), 10))
             hist_lines = []
-            for t, uid, e in items[:15]:
-                member = inter.guild.get_member(int(uid)); name = member.display_name if member else f"User {uid}"
+            for t, uid, e in heapq.nlargest(15, items, key=lambda x: x[0]):
+                name = f"<@{uid}>"
                 sign = "+" if e["result"] >= 0 else "-"
                 hist_lines.append(f"<t:{t}:R> — {name}: {e['game']} bet {e['bet']} ⇒ {sign}{abs(e['result'])}")
-            await inter.response.send_message("\n".join(hist_lines) or "_No recent bets_", ephemeral=True)
+            await inter.response.send_message("\n".join(hist_lines) or "_No recent bets_", ephemeral=True,
+                                              allowed_mentions=discord.AllowedMentions.none())
     await interaction.response.send_message(embed=embed, view=PanelView(), ephemeral=True)
 
 @tree.command(name="mystats", description="Show your gambling stats")
 async def mystats_cmd(interaction: discord.Interaction):
     g, u = str(interaction.guild.id), str(interaction.user.id)
-    s = ECON.setdefault("stats", {}).setdefault(g, {}).setdefault(u, {"bets":0,"won":0,"lost":0,"biggest":0})
+    s = _user_stats(g, u)
     _,_,_,_,curr = _limits(interaction.guild.id); net = s["won"] - s["lost"]
     em = discord.Embed(title=f"{interaction.user.display_name} — Stats",
                        description=(f"🎲 **Bets**: {s['bets']}\n💰 **Won**: {_fmt_currency(s['won'], curr)}\n"
@@ -1359,7 +1930,7 @@ def render_embed(self) -> discord.Embed:
         bet = self.get_bet(interaction.user.id)
         if not await self._guard(interaction, bet): return
         min_bet, max_bet, edge, _, curr = _limits(interaction.guild.id)
-        res = random.choice(("heads", "tails"))
+        res = "heads" if random.random() < 0.5 else "tails"
         if res == "heads":
             win = int(round(bet * (2.0 - edge)))
             new_bal = await eco_add(interaction.guild.id, interaction.user.id, win)
@@ -1375,7 +1946,7 @@ def render_embed(self) -> discord.Embed:
         bet = self.get_bet(interaction.user.id)
         if not await self._guard(interaction, bet): return
         min_bet, max_bet, edge, _, curr = _limits(interaction.guild.id)
-        res = random.choice(("heads", "tails"))
+        res = "heads" if random.random() < 0.5 else "tails"
         if res == "tails":
             win = int(round(bet * (2.0 - edge)))
             new_bal = await eco_add(interaction.guild.id, interaction.user.id, win)
@@ -1392,7 +1963,7 @@ def render_embed(self) -> discord.Embed:
         bet = self.get_bet(interaction.user.id)
         if not await self._guard(interaction, bet): return
         min_bet, max_bet, edge, _, curr = _limits(interaction.guild.id)
-        reels = [random.choice(SLOT_EMOJI) for _ in range(3)]
+        reels = random.choices(SLOT_EMOJI, k=3)
         text = " | ".join(reels); win = 0
         if len(set(reels)) == 1: win = int(round(bet * (9.0 - edge)))
         elif reels[0] == reels[1] or reels[1] == reels[2]: win = int(round(bet * (2.0 - edge)))
@@ -1576,27 +2147,32 @@ async def casino_cmd(interaction: discord.Interaction):
 @banker_only()
 @app_commands.describe(url="Direct image URL (.png/.jpg)")
 async def casino_images_add(interaction: discord.Interaction, url: str):
-    os.makedirs(CASINO_ASSETS_DIR, exist_ok=True)
+    _ensure_dir(CASINO_ASSETS_DIR)
     fname = f"web_{int(time.time())}.png"
     dest = os.path.join(CASINO_ASSETS_DIR, fname)
-    ok = _download_image_sync(url, dest)
+    ok = await _run_blocking(_download_image_sync, url, dest)
     if ok:
         await interaction.response.send_message(f"✅ Saved **{fname}**", ephemeral=True)
     else:
         await interaction.response.send_message("❌ Failed to download. Check the URL.", ephemeral=True)
 
-@casinoadmin.command(name="images_clear", description="Clear the casino banner folder")
-@banker_only()
-async def casino_images_clear(interaction: discord.Interaction):
-    if not os.path.isdir(CASINO_ASSETS_DIR):
-        return await interaction.response.send_message("Folder not found.", ephemeral=True)
+def _clear_dir(path: str) -> int:
+    """Delete the files in path; returns how many were removed."""
     n = 0
-    for fn in os.listdir(CASINO_ASSETS_DIR):
+    for fn in os.listdir(path):
         try:
-            os.remove(os.path.join(CASINO_ASSETS_DIR, fn))
+            os.remove(os.path.join(path, fn))
             n += 1
         except Exception:
             pass
+    return n
+
+@casinoadmin.command(name="images_clear", description="Clear the casino banner folder")
+@banker_only()
+async def casino_images_clear(interaction: discord.Interaction):
+    if not os.path.isdir(CASINO_ASSETS_DIR):
+        return await interaction.response.send_message("Folder not found.", ephemeral=True)
+    n = await _run_blocking(_clear_dir, CASINO_ASSETS_DIR)
     await interaction.response.send_message(f"🧹 Cleared {n} files.", ephemeral=True)
 
 @casinoadmin.command(name="images_list", description="List banner images")
@@ -1604,7 +2180,7 @@ async def casino_images_clear(interaction: discord.Interaction):
 async def casino_images_list(interaction: discord.Interaction):
     if not os.path.isdir(CASINO_ASSETS_DIR):
         return await interaction.response.send_message("_No folder_", ephemeral=True)
-    files = [fn for fn in os.listdir(CASINO_ASSETS_DIR) if fn.lower().endswith(('.png','.jpg','.jpeg'))]
+    files = [fn for fn in await _run_blocking(os.listdir, CASINO_ASSETS_DIR) if fn.lower().endswith(('.png','.jpg','.jpeg'))]
     if not files:
         return await interaction.response.send_message("_No images stored_", ephemeral=True)
     txt = "\n".join(f"- {fn}" for fn in files[:40])
@@ -1614,13 +2190,21 @@ async def casino_images_list(interaction: discord.Interaction):
 # -------------------- Ready / sync --------------------
 @bot.event
 async def on_ready():
+    global _JSON_FLUSH_TASK
     print(f"✅ Logged in as {bot.user} ({bot.user.id})")
+    if _JSON_FLUSH_TASK is None or _JSON_FLUSH_TASK.done():
+        _JSON_FLUSH_TASK = asyncio.create_task(_json_flusher())
     try:
         synced = await bot.tree.sync()
         print(f"🔧 Slash commands synced: {len(synced)}")
     except Exception as e:
         print("⚠️ Slash sync failed:", e)
 
+@bot.event
+async def on_guild_remove(guild: discord.Guild):
+    _SETTINGS_CACHE.pop(guild.id, None)
+    _LIMITS_CACHE.pop(guild.id, None)
+
 
 # -------------------- Mini-game: Unit Quiz --------------------
 @tree.command(name="unitquiz", description="Guess the unit from a picture (uses your units_assets and units.txt)")
@@ -1632,14 +2216,13 @@ async def unitquiz_cmd(interaction: discord.Interaction, bet: int):
     units = read_units_txt()
     if not units:
         return await interaction.response.send_message("No units in **units.txt**.", ephemeral=True)
-    import random, os, io
-    candidates = [u for u in units if asset_path_for(u, 1)]
+    candidates = spawnable_units()
     if not candidates:
         return await interaction.response.send_message(f"No images ending with '1.png' found in `{ASSETS_DIR}`.", ephemeral=True)
     correct = random.choice(candidates)
     correct_path = asset_path_for(correct, 1)
-    others = [u for u in units if u != correct]
-    random.shuffle(others)
+    # Draw one spare so dropping the answer still leaves three distractors.
+    others = [u for u in random.sample(units, min(4, len(units))) if u != correct]
     choices = [correct] + others[:3]
     random.shuffle(choices)
     min_bet, max_bet, edge, _, curr = _limits(interaction.guild.id)
@@ -1649,10 +2232,8 @@ async def unitquiz_cmd(interaction: discord.Interaction, bet: int):
         return await interaction.response.send_message("Insufficient balance.", ephemeral=True)
     file = None
     try:
-        with open(correct_path, "rb") as f:
-            imgdata = f.read()
         fname = "unitquiz.png"
-        file = discord.File(io.BytesIO(imgdata), filename=fname)
+        file = discord.File(correct_path, filename=fname)
         image_url = f"attachment://{fname}"
     except Exception:
         file = None
@@ -1710,10 +2291,8 @@ async def unitquiz_cmd(interaction: discord.Interaction, bet: int):
 @tree.command(name="unitspawn", description="Spawn a random unit; first person to claim wins (optional prize)")
 @app_commands.describe(reward="Optional prize amount to award the claimer (default 0)")
 async def unitspawn_cmd(interaction: discord.Interaction, reward: int = 0):
-    import random, os, io
     # Load available units that have panel 1.png
-    units = read_units_txt()
-    candidates = [u for u in units if asset_path_for(u, 1)]
+    candidates = spawnable_units()
     if not candidates:
         return await interaction.response.send_message(f"No images ending with '1.png' found in `{ASSETS_DIR}`.", ephemeral=True)
     unit = random.choice(candidates)
@@ -1722,10 +2301,8 @@ async def unitspawn_cmd(interaction: discord.Interaction, reward: int = 0):
     # Prepare attachment
     file = None; image_url = None
     try:
-        with open(img_path, "rb") as f:
-            data = f.read()
         fname = "spawn.png"
-        file = discord.File(io.BytesIO(data), filename=fname)
+        file = discord.File(img_path, filename=fname)
         image_url = f"attachment://{fname}"
     except Exception:
         pass
@@ -1762,19 +2339,15 @@ async def unitspawn_cmd(interaction: discord.Interaction, reward: int = 0):
 
 async def _unitspawn_send(channel: discord.TextChannel, reward_min: int, reward_max: int):
     # Reuse logic from /unitspawn
-    import random, io, os
-    units = read_units_txt()
-    candidates = [u for u in units if asset_path_for(u, 1)]
+    candidates = spawnable_units()
     if not candidates:
         return
     unit = random.choice(candidates)
     img_path = asset_path_for(unit, 1)
     file = None; image_url = None
     try:
-        with open(img_path, "rb") as f:
-            data = f.read()
         fname = "spawn.png"
-        file = discord.File(io.BytesIO(data), filename=fname)
+        file = discord.File(img_path, filename=fname)
         image_url = f"attachment://{fname}"
     except Exception:
         pass
@@ -1909,8 +2482,10 @@ async def on_message(message: discord.Message):
             JJK_ACTIVE.pop(key, None)
         else:
             unit = active["unit"]
-            if _norm_name(message.content) == _norm_name(unit):
-                # Winner!
+            if _norm_name(message.content) == active["norm"]:
+                # Winner! Drop the spawn before any await so a second correct answer
+                # arriving meanwhile can't claim it too.
+                JJK_ACTIVE.pop(key, None)
                 reward_min = int(cfg.get("reward_min", 0))
                 reward_max = int(cfg.get("reward_max", 0))
                 reward = random.randint(reward_min, reward_max) if reward_max >= reward_min and reward_max > 0 else 0
@@ -1930,7 +2505,6 @@ async def on_message(message: discord.Message):
                     await msg.edit(embed=em2, view=None)
                 except Exception:
                     pass
-                JJK_ACTIVE.pop(key, None)
                 return  # stop processing to avoid also incrementing counter
 
     # If no active spawn: increment counter and maybe spawn
@@ -1945,17 +2519,14 @@ async def on_message(message: discord.Message):
         st["count"] = 0
         st["threshold"] = _jjk_threshold(min_msgs, max_msgs)
         # Try to spawn
-        units = read_units_txt()
-        candidates = [u for u in units if asset_path_for(u, 1)]
+        candidates = spawnable_units()
         if candidates:
             unit = random.choice(candidates)
             img_path = asset_path_for(unit, 1)
             file = None; image_url = None
             try:
-                with open(img_path, "rb") as f:
-                    data = f.read()
                 fname = "spawn.png"
-                file = discord.File(io.BytesIO(data), filename=fname)
+                file = discord.File(img_path, filename=fname)
                 image_url = f"attachment://{fname}"
             except Exception:
                 pass
@@ -1968,7 +2539,7 @@ async def on_message(message: discord.Message):
             view.add_item(Dummy())
             msg = await message.channel.send(embed=em, view=view, file=file if file else discord.utils.MISSING)
             # Arm active spawn with 120s deadline
-            JJK_ACTIVE[key] = {"unit": unit, "deadline": time.time()+120, "message_id": msg.id}
+            JJK_ACTIVE[key] = {"unit": unit, "norm": _norm_name(unit), "deadline": time.time()+120, "message_id": msg.id}
     JJK_STATE[key] = st
 
 
@@ -2021,7 +2592,7 @@ if __name__ == "__main__":
     token = os.getenv("DISCORD_TOKEN")
     if not token:
         try:
-            with open("token.txt","r",encoding="utf-8") as f:
+            with open(TOKEN_PATH,"r",encoding="utf-8") as f:
                 token = f.read().strip()
         except Exception:
             token = None
@@ -2035,3 +2606,5 @@ if __name__ == "__main__":
     except Exception as e:
         logging.exception("Failed to start bot: %s", e)
         raise
+    finally:
+        _flush_json_now()
@@ -1,6 +1,6 @@
 
 # gtd_capture.py
-import os, re, time, pathlib
+import io, re, time, pathlib
 from typing import Optional, List, Tuple
 from PIL import Image, ImageOps
 from playwright.sync_api import sync_playwright
@@ -11,8 +11,8 @@ def _slug(s: str) -> str:
     s = re.sub(r"\s+", " ", s).strip().lower()
     return re.sub(r"[^a-z0-9]+", "-", s).strip("-") or "item"
 
-def _pad(in_path: str, out_path: str, pad: int = 8):
-    im = Image.open(in_path)
+def _pad(png: bytes, out_path: str, pad: int = 8):
+    im = Image.open(io.BytesIO(png))
     ImageOps.expand(im, border=pad, fill="black").save(out_path)
 
 def _auto_scroll(page, max_steps=50, pause=0.35):
@@ -164,12 +164,9 @@ def capture_gtd_cards(
                 title = _title(card)
                 if filt and not filt.search(title): continue
                 base_name = f"{idx:03d}_{_slug(title)}"
-                raw = sub / f"{base_name}.raw.png"
                 final = sub / f"{base_name}.png"
-                card.screenshot(path=str(raw), animations="disabled", timeout=30_000)
-                _pad(str(raw), str(final), pad=8)
-                try: os.remove(raw)
-                except OSError: pass
+                png = card.screenshot(animations="disabled", timeout=30_000)
+                _pad(png, str(final), pad=8)
                 saved.append(str(final))
 
             if page_num >= page_total: break